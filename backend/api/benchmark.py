@@ -0,0 +1,162 @@
+import io
+import statistics
+import time
+import tracemalloc
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, Recipe, Tag
+from users.models import User
+from .v1.constants import BENCHMARK_MIN_DELTA_MS
+from .v1.short_links import ShortLinkApplication
+
+METRICS = ('p50_ms', 'p95_ms', 'queries', 'sql_ms', 'peak_kb')
+
+
+def get_fixtures():
+    """Объекты для сценариев, выбранные детерминированно."""
+    user = User.objects.filter(
+        shopping_cart__isnull=False, follower__isnull=False
+    ).order_by('pk').first() or User.objects.order_by('pk').first()
+    recipe = Recipe.objects.order_by('-favorites_count', 'pk').first()
+    tag = Tag.objects.order_by('pk').first()
+    ingredient = Ingredient.objects.order_by('pk').first()
+    if not all((user, recipe, tag, ingredient)):
+        raise ValueError('База пуста: сначала generate_data')
+    return {
+        'token': Token.objects.get_or_create(user=user)[0].key,
+        'recipe': recipe,
+        'tag': tag.slug,
+        'ingredient': ingredient.name[:2],
+    }
+
+
+def get_scenarios(fixtures):
+    """{name: (auth, path)}; путь /s/ обслуживается WSGI-обёрткой."""
+    recipe = fixtures['recipe']
+    return {
+        'recipes-anon': (False, '/api/recipes/'),
+        'recipes-auth': (True, '/api/recipes/'),
+        'recipes-tags': (True, f'/api/recipes/?tags={fixtures["tag"]}'),
+        'recipes-favorited': (True, '/api/recipes/?is_favorited=1'),
+        'recipes-in-cart': (True, '/api/recipes/?is_in_shopping_cart=1'),
+        'recipe-detail': (True, f'/api/recipes/{recipe.pk}/'),
+        'subscriptions': (True, '/api/users/subscriptions/'),
+        'ingredients-search': (
+            False, f'/api/ingredients/?name={fixtures["ingredient"]}'
+        ),
+        'download-shopping-cart': (
+            True, '/api/recipes/download_shopping_cart/'
+        ),
+        'short-link': (False, f'/s/{recipe.short_hash}/'),
+    }
+
+
+def call_short_link(application, path):
+    statuses = []
+    application(
+        {'PATH_INFO': path, 'REQUEST_METHOD': 'GET',
+         'wsgi.input': io.BytesIO()},
+        lambda status, headers: statuses.append(status),
+    )
+    return int(statuses[0].split()[0])
+
+
+def make_request(client, application, path):
+    if path.startswith('/s/'):
+        return call_short_link(application, path)
+    response = client.get(path)
+    if response.streaming:
+        b''.join(response.streaming_content)
+    return response.status_code
+
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def run_scenario(client, path, iterations, warmup, cold):
+    application = ShortLinkApplication(None)
+    for _ in range(warmup):
+        make_request(client, application, path)
+    timings, queries, sql_time = [], 0, 0.0
+    for _ in range(iterations):
+        if cold:
+            cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            status = make_request(client, application, path)
+            timings.append(time.perf_counter() - started)
+        queries = max(queries, len(captured))
+        sql_time += sum(float(query['time']) for query in captured)
+    if cold:
+        cache.clear()
+    # Память отдельным проходом: tracemalloc замедляет запрос.
+    tracemalloc.start()
+    make_request(client, application, path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        'status': status,
+        'p50_ms': round(statistics.median(timings) * 1000, 2),
+        'p95_ms': round(percentile(timings, 0.95) * 1000, 2),
+        'queries': queries,
+        'sql_ms': round(sql_time / iterations * 1000, 2),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def run_benchmarks(iterations, warmup, cold=False, only=None):
+    fixtures = get_fixtures()
+    anonymous = APIClient()
+    authenticated = APIClient()
+    authenticated.credentials(HTTP_AUTHORIZATION=f'Token {fixtures["token"]}')
+    results = {}
+    for name, (auth, path) in get_scenarios(fixtures).items():
+        if only and name not in only:
+            continue
+        results[name] = run_scenario(
+            authenticated if auth else anonymous, path,
+            iterations, warmup, cold,
+        )
+    return {
+        'meta': {
+            'database': connection.vendor,
+            'users': User.objects.count(),
+            'recipes': Recipe.objects.count(),
+            'iterations': iterations,
+            'cold': cold,
+        },
+        'results': results,
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Сравнение с базовой линией: [(сценарий, метрика, было, стало,
+    регрессия)]. Регрессия — больше запросов или p95 хуже на threshold
+    и не меньше чем на BENCHMARK_MIN_DELTA_MS.
+    """
+    rows = []
+    for name, metrics in results['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        for metric in METRICS:
+            old, new = base[metric], metrics[metric]
+            if metric == 'queries':
+                regression = new > old
+            elif metric == 'p95_ms':
+                regression = (
+                    new > old * (1 + threshold)
+                    and new - old > BENCHMARK_MIN_DELTA_MS
+                )
+            else:
+                regression = False
+            rows.append((name, metric, old, new, regression))
+    return rows
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Поколения кешей, кеш ответов и индексы в памяти процессов
+    согласуются только через общий кеш.
+    """
+    backend = settings.CACHES['default']['BACKEND']
+    if settings.DEBUG or backend not in LOCAL_CACHE_BACKENDS:
+        return []
+    return [Warning(
+        f'Кеш {backend} не общий для процессов: изменения из команд '
+        'управления и других воркеров gunicorn не сбросят кеш ответов '
+        'и индексы в памяти до истечения таймаута.',
+        hint='Задайте CACHE_BACKEND и CACHE_LOCATION, например '
+             'django.core.cache.backends.memcached.PyMemcacheCache и '
+             'memcached:11211.',
+        id='api.W001',
+    )]
@@ -0,0 +1,115 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from api.benchmark import METRICS, compare, run_benchmarks
+from api.v1.constants import (BENCHMARK_ITERATIONS, BENCHMARK_THRESHOLD,
+                              BENCHMARK_WARMUP)
+
+BASELINE_PATH = os.path.join(settings.BASE_DIR, 'benchmarks', 'baseline.json')
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеры горячих эндпоинтов: p50/p95, число и время SQL-запросов, '
+        'пиковая память; сравнение с базовой линией'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations', type=int, default=BENCHMARK_ITERATIONS
+        )
+        parser.add_argument('--warmup', type=int, default=BENCHMARK_WARMUP)
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кеш перед каждым запросом',
+        )
+        parser.add_argument(
+            '--scenario', action='append', dest='scenarios',
+            help='Запустить только этот сценарий (можно несколько раз)',
+        )
+        parser.add_argument(
+            '--output', help='Записать результаты в JSON-файл',
+        )
+        parser.add_argument(
+            '--baseline', default=BASELINE_PATH,
+            help='Файл базовой линии для сравнения',
+        )
+        parser.add_argument(
+            '--update-baseline', action='store_true',
+            help='Перезаписать базовую линию текущими результатами',
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=BENCHMARK_THRESHOLD,
+            help='Допустимый рост p95 (доля)',
+        )
+        parser.add_argument(
+            '--fail-on-regression', action='store_true',
+            help='Завершиться с ошибкой при регрессии',
+        )
+
+    def write_json(self, path, data):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(data, file, ensure_ascii=False, indent=2)
+            file.write('\n')
+
+    def handle(self, *args, **options):
+        scenarios = options['scenarios']
+        with override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']
+        ):
+            try:
+                results = run_benchmarks(
+                    options['iterations'], options['warmup'],
+                    options['cold'], scenarios,
+                )
+            except ValueError as error:
+                raise CommandError(error)
+        unknown = set(scenarios or ()) - set(results['results'])
+        if unknown:
+            raise CommandError(f'Нет сценариев: {", ".join(unknown)}')
+
+        self.stdout.write(
+            f'{"сценарий":<24}' + ''.join(f'{m:>10}' for m in METRICS)
+        )
+        for name, metrics in results['results'].items():
+            self.stdout.write(f'{name:<24}' + ''.join(
+                f'{metrics[metric]:>10}' for metric in METRICS
+            ))
+            if metrics['status'] >= 400:
+                self.stdout.write(self.style.WARNING(
+                    f'{name}: ответ {metrics["status"]}'
+                ))
+        if options['output']:
+            self.write_json(options['output'], results)
+        if options['update_baseline']:
+            self.write_json(options['baseline'], results)
+            self.stdout.write(self.style.SUCCESS('Базовая линия обновлена'))
+            return
+        if not os.path.exists(options['baseline']):
+            return
+        with open(options['baseline'], encoding='utf-8') as file:
+            baseline = json.load(file)
+        if baseline['meta'] != results['meta']:
+            self.stdout.write(self.style.WARNING(
+                f'Данные отличаются от базовой линии: {baseline["meta"]}'
+            ))
+        regressions = []
+        for name, metric, old, new, regression in compare(
+            results, baseline, options['threshold']
+        ):
+            if old == new:
+                continue
+            line = f'{name:<24}{metric:>10}: {old} -> {new}'
+            if regression:
+                regressions.append(line)
+                line = self.style.ERROR(line)
+            self.stdout.write(line)
+        if regressions and options['fail_on_regression']:
+            raise CommandError(f'Регрессий: {len(regressions)}')
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS('Регрессий нет'))
@@ -0,0 +1,109 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.cache import (INGREDIENTS_GENERATION,
+                           RECIPE_INGREDIENTS_GENERATION,
+                           RECIPE_RENDER_GENERATION, RECIPES_GENERATION,
+                           TAGS_GENERATION, set_generation)
+from recipes.counters import reconcile_counters
+from recipes.data_generator import generate_data
+from recipes.search import index_recipes
+from recipes.shopping_list import rebuild
+
+SEARCH_INDEX_BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = (
+        'Синтетические пользователи, рецепты, избранное, корзины и '
+        'подписки для нагрузочного тестирования'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Одинаковый seed даёт одинаковые данные',
+        )
+        parser.add_argument(
+            '--favorites', type=int, default=20,
+            help='Среднее число рецептов в избранном у пользователя',
+        )
+        parser.add_argument(
+            '--follows', type=int, default=10,
+            help='Среднее число подписок у пользователя',
+        )
+        parser.add_argument(
+            '--cart-share', type=float, default=0.3,
+            help='Доля пользователей с непустой корзиной',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Число процессов (только для PostgreSQL)',
+        )
+        parser.add_argument('--chunk-size', type=int, default=10000)
+        parser.add_argument(
+            '--skip-search-index', action='store_true',
+            help='Не строить поисковый индекс новых рецептов',
+        )
+
+    def step(self, message):
+        self.stdout.write(f'{message}... ', ending='')
+        self.stdout.flush()
+        self.started = time.monotonic()
+
+    def done(self):
+        self.stdout.write(f'{time.monotonic() - self.started:.1f} с')
+
+    def handle(self, *args, **options):
+        done = {}
+
+        def progress(phase, count):
+            if done and phase not in done:
+                self.stdout.write('')
+            done[phase] = done.get(phase, 0) + count
+            self.stdout.write(f'\r{phase}: {done[phase]}', ending='')
+            self.stdout.flush()
+
+        started = time.monotonic()
+        try:
+            recipe_ids = generate_data(
+                options['users'], options['recipes'],
+                seed=options['seed'],
+                favorites=options['favorites'],
+                follows=options['follows'],
+                cart_share=options['cart_share'],
+                workers=options['workers'],
+                chunk_size=options['chunk_size'],
+                progress=progress,
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        self.stdout.write('')
+
+        self.step('Счётчики')
+        reconcile_counters()
+        self.done()
+        self.step('Списки покупок')
+        rebuild()
+        self.done()
+        if not options['skip_search_index']:
+            self.step('Поисковый индекс')
+            recipe_ids.sort()
+            for start in range(0, len(recipe_ids), SEARCH_INDEX_BATCH_SIZE):
+                index_recipes(
+                    recipe_ids[start:start + SEARCH_INDEX_BATCH_SIZE]
+                )
+            self.done()
+        set_generation(
+            RECIPES_GENERATION, RECIPE_RENDER_GENERATION, TAGS_GENERATION,
+            INGREDIENTS_GENERATION, RECIPE_INGREDIENTS_GENERATION,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.monotonic() - started:.1f} с: '
+            f'{options["users"]} пользователей, '
+            f'{options["recipes"]} рецептов'
+        ))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from recipes.images import process_image
+from recipes.models import Recipe
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Уменьшенные копии изображений рецептов и аватаров'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересоздать копии и для уже обработанных изображений',
+        )
+
+    def handle(self, *args, **options):
+        for model, field_name in ((Recipe, 'image'), (User, 'avatar')):
+            objects = model.objects.exclude(
+                **{f'{field_name}__isnull': True}
+            ).exclude(**{field_name: ''})
+            if not options['all']:
+                objects = objects.filter(**{f'{field_name}_variants': {}})
+            rows = list(objects.values_list('pk', field_name))
+            for number, (pk, name) in enumerate(rows, 1):
+                process_image(model._meta.label, pk, field_name, name)
+                self.stdout.write(
+                    f'\r{model._meta.verbose_name_plural}: '
+                    f'{number}/{len(rows)}',
+                    ending=''
+                )
+            self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS('Копии изображений созданы'))
@@ -1,145 +1,81 @@
-import csv
 import os
 
 from django.conf import settings
-from django.core.management.base import BaseCommand
-from recipes.models import Ingredient
+from django.core.management.base import BaseCommand, CommandError
 
+from recipes.constants import IMPORT_BATCH_SIZE
+from recipes.ingredient_import import FORMATS, import_ingredients
 
-class Command(BaseCommand):
-    help = 'Импорт ингредиентов из data/ingredients.csv'
+REPORT_LIMIT = 20
 
-    def print_progress(self, current, total, created, duplicates, errors):
-        progress = (current / total) * 100 if total > 0 else 0
-        self.stdout.write(
-            f'\rПрогресс: {progress: .1f}% | '
-            f'Создано: {created} | '
-            f'Дубликаты: {duplicates} | '
-            f'Ошибки: {errors} | '
-            f'Обработано: {current}/{total}',
-            ending=''
-        )
 
-    def handle(self, *args, **options):
-        csv_file_path = os.path.join(
-            settings.BASE_DIR, 'data', 'ingredients.csv')
+class Command(BaseCommand):
+    help = 'Импорт ингредиентов из CSV или JSON (по умолчанию data/)'
 
-        self.stdout.write(
-            self.style.SUCCESS(f'Путь к файлу: {csv_file_path}')
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?',
+            default=os.path.join(settings.BASE_DIR, 'data', 'ingredients.csv'),
+            help='Путь к файлу CSV (название,единица) или JSON',
         )
-        if not os.path.exists(csv_file_path):
-            self.stdout.write(
-                self.style.ERROR(f'Файл {csv_file_path} не найден!')
-            )
+        parser.add_argument(
+            '--format', choices=FORMATS, dest='file_format',
+            help='Формат файла, если не определяется автоматически',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Показать изменения без записи в базу',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=IMPORT_BATCH_SIZE,
+            help='Количество строк в одной пачке записи',
+        )
+
+    def write_limited(self, lines, style=None):
+        limit = None if self.verbosity > 1 else REPORT_LIMIT
+        for line in lines[:limit]:
+            self.stdout.write(style(line) if style else line)
+        if limit is not None and len(lines) > limit:
             self.stdout.write(
-                self.style.WARNING(
-                    'Создайте файл ingredients.csv в папке data/')
+                f'... и ещё {len(lines) - limit} (подробнее: -v 2)'
             )
-            return
-
-        self.stdout.write(
-            self.style.SUCCESS('Начинаю импорт ингредиентов...')
-        )
 
+    def handle(self, *args, **options):
+        path = options['path']
+        self.verbosity = options['verbosity']
+        if not os.path.exists(path):
+            raise CommandError(f'Файл {path} не найден')
+        self.stdout.write(f'Импорт из {path}')
         try:
-            with open(csv_file_path, 'r', encoding='utf-8') as file:
-                total_lines = sum(1 for line in file)
-
-            if total_lines == 0:
-                self.stdout.write(
-                    self.style.WARNING('Файл пустой')
-                )
-                return
-
-            ingredients_to_create = []
-            duplicates = 0
-            created = 0
-            errors = 0
-            processed = 0
-
-            with open(csv_file_path, 'r', encoding='utf-8') as file:
-                reader = csv.reader(file)
-
-                for row_num, row in enumerate(reader, 1):
-                    processed += 1
-
-                    if len(row) < 2:
-                        self.stdout.write(
-                            self.style.WARNING(
-                                f'Строка {row_num}: '
-                                f'недостаточно данных - {row}')
-                        )
-                        errors += 1
-                        continue
-
-                    name = row[0].strip()
-                    measurement_unit = row[1].strip()
-
-                    if not name:
-                        self.stdout.write(
-                            self.style.WARNING(
-                                f'Строка {row_num}: пустое '
-                                f'название ингредиента')
-                        )
-                        errors += 1
-                        continue
-
-                    if not measurement_unit:
-                        self.stdout.write(
-                            self.style.WARNING(
-                                f'Строка {row_num}: пустая единица '
-                                f'измерения для "{name}"')
-                        )
-                        errors += 1
-                        continue
-
-                    if Ingredient.objects.filter(
-                        name__iexact=name,
-                        measurement_unit__iexact=measurement_unit
-                    ).exists():
-                        duplicates += 1
-                    else:
-                        ingredients_to_create.append(
-                            Ingredient(
-                                name=name,
-                                measurement_unit=measurement_unit
-                            )
-                        )
-                        created += 1
-
-                    if processed % 50 == 0 or processed == total_lines:
-                        self.print_progress(
-                            processed,
-                            total_lines,
-                            created,
-                            duplicates,
-                            errors)
-
-            if ingredients_to_create:
-                self.stdout.write('\n' + '=' * 60)
-                self.stdout.write('Создаю ингредиенты в базе данных...')
-
-                Ingredient.objects.bulk_create(
-                    ingredients_to_create,
-                    batch_size=500,
-                    ignore_conflicts=True
-                )
-
-            self.stdout.write('\n' + '=' * 60)
-            self.stdout.write(
-                self.style.SUCCESS(
-                    'ИМПОРТ ЗАВЕРШЕН!\n'
-                    f'Всего строк в файле: {total_lines}\n'
-                    f'Обработано данных: {processed}\n'
-                    f'Успешно создано: {created}\n'
-                    f'Пропущено дубликатов: {duplicates}\n'
-                    f'Ошибок формата: {errors}\n'
-                    f'Общее количество ингредиентов в базе: '
-                    f'{Ingredient.objects.count()}'
-                )
+            report = import_ingredients(
+                path, options['file_format'], options['dry_run'],
+                options['batch_size'],
             )
+        except (ValueError, UnicodeDecodeError) as error:
+            raise CommandError(f'Ошибка при импорте: {error}')
 
-        except Exception as e:
-            self.stdout.write(
-                self.style.ERROR(f'Ошибка при импорте: {str(e)}')
+        self.write_limited(
+            [f'Строка {number}: {error}' for number, error in report.errors],
+            self.style.WARNING,
+        )
+        if options['dry_run']:
+            self.write_limited(
+                [f'+ {name}, {unit}' for name, unit in report.new],
+                self.style.SUCCESS,
+            )
+            self.write_limited(
+                [f'- {name}, {unit} (нет в файле, останется в базе)'
+                 for name, unit in report.missing],
             )
+        created = (
+            f'Будет создано: {len(report.new)}' if options['dry_run']
+            else f'Создано: {report.created}'
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано строк: {report.processed}\n'
+            f'{created}\n'
+            f'Уже в базе: {report.existing}\n'
+            f'Повторы в файле: {report.duplicates}\n'
+            f'Ошибок формата: {len(report.errors)}\n'
+            f'Есть в базе, но нет в файле: {len(report.missing)}'
+        ))
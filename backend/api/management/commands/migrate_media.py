@@ -0,0 +1,141 @@
+import posixpath
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F
+
+from recipes.constants import CONTENT_STORAGE_DIR, IMAGE_VARIANTS_DIR
+from recipes.images import get_variants_field
+from recipes.models import Recipe, StoredFile
+from recipes.storage import ContentAddressedStorage
+from users.models import User
+
+IMAGE_FIELDS = ((Recipe, 'image'), (User, 'avatar'))
+
+
+def walk(storage, path):
+    if not storage.exists(path):
+        return
+    directories, files = storage.listdir(path)
+    for file_name in files:
+        yield posixpath.join(path, file_name)
+    for directory in directories:
+        yield from walk(storage, posixpath.join(path, directory))
+
+
+def format_size(size):
+    for unit in ('Б', 'КБ', 'МБ'):
+        if size < 1024:
+            return f'{size:.0f} {unit}'
+        size /= 1024
+    return f'{size:.1f} ГБ'
+
+
+class Command(BaseCommand):
+    help = (
+        'Перенос изображений в хранилище по хешу содержимого '
+        'с удалением дубликатов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только посчитать, сколько места освободится',
+        )
+        parser.add_argument(
+            '--delete-orphans', action='store_true',
+            help='Удалить файлы, на которые не ссылается ни одна запись',
+        )
+
+    def handle(self, *args, **options):
+        storage = default_storage
+        if not isinstance(storage, ContentAddressedStorage):
+            raise CommandError(
+                'DEFAULT_FILE_STORAGE должен быть ContentAddressedStorage'
+            )
+        dry_run = options['dry_run']
+        self.removed = self.written = self.moved = 0
+        written_names = set()
+        referenced = set()
+        for model, field_name in IMAGE_FIELDS:
+            pks_by_name = {}
+            rows = model.objects.exclude(**{f'{field_name}__isnull': True})
+            rows = rows.exclude(**{field_name: ''}).exclude(
+                **{f'{field_name}__startswith': f'{CONTENT_STORAGE_DIR}/'}
+            ).values_list('pk', field_name)
+            for pk, name in rows.iterator():
+                pks_by_name.setdefault(name, []).append(pk)
+            referenced.update(pks_by_name)
+            for name, pks in pks_by_name.items():
+                if not storage.exists(name):
+                    self.stderr.write(f'Файл не найден: {name}')
+                    continue
+                size = storage.size(name)
+                with storage.open(name) as file:
+                    new_name = storage.get_content_name(name, file)
+                    if new_name not in written_names and not storage.exists(
+                        new_name
+                    ):
+                        self.written += size
+                    written_names.add(new_name)
+                    if not dry_run:
+                        new_name = storage.save(name, file)
+                self.removed += size
+                self.moved += len(pks)
+                if dry_run:
+                    continue
+                StoredFile.objects.filter(name=new_name).update(
+                    references=F('references') + len(pks) - 1
+                )
+                model.objects.filter(pk__in=pks).update(**{
+                    field_name: new_name,
+                    get_variants_field(field_name): {},
+                })
+                self.delete(storage, name)
+        if options['delete_orphans']:
+            self.delete_orphans(storage, referenced, dry_run)
+        self.report(dry_run)
+
+    def delete(self, storage, name):
+        storage.delete(name)
+        variants = posixpath.join(
+            IMAGE_VARIANTS_DIR, posixpath.splitext(name)[0]
+        )
+        for variant in walk(storage, variants):
+            storage.delete(variant)
+
+    def delete_orphans(self, storage, referenced, dry_run):
+        """Файлы в каталогах upload_to, которых нет ни в одной записи."""
+        sources = {posixpath.splitext(name)[0] for name in referenced}
+        for model, field_name in IMAGE_FIELDS:
+            upload_to = model._meta.get_field(field_name).upload_to
+            orphans = [
+                name for name in walk(storage, upload_to.rstrip('/'))
+                if name not in referenced
+            ] + [
+                name for name in walk(
+                    storage, posixpath.join(IMAGE_VARIANTS_DIR, upload_to)
+                )
+                if posixpath.dirname(name).split('/', 1)[1] not in sources
+            ]
+            for name in orphans:
+                self.removed += storage.size(name)
+                if not dry_run:
+                    storage.delete(name)
+
+    def report(self, dry_run):
+        reclaimed = self.removed - self.written
+        prefix = 'Будет освобождено' if dry_run else 'Освобождено'
+        self.stdout.write(
+            f'Записей перенесено: {self.moved}, удалено '
+            f'{format_size(self.removed)}, записано '
+            f'{format_size(self.written)}'
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f'{prefix}: {format_size(reclaimed)}')
+        )
+        if self.moved and not dry_run:
+            self.stdout.write(
+                'Уменьшенные копии сброшены, создайте их заново: '
+                'python3 manage.py generate_image_variants'
+            )
@@ -0,0 +1,93 @@
+import os
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.profiling import PROFILE_EXTENSION
+
+
+def read_profiles(directory, routes):
+    """Стеки всех файлов; имя маршрута становится корневым кадром."""
+    stacks, requests = Counter(), Counter()
+    for route in sorted(os.listdir(directory)):
+        route_dir = os.path.join(directory, route)
+        if not os.path.isdir(route_dir) or routes and route not in routes:
+            continue
+        for file_name in os.listdir(route_dir):
+            if not file_name.endswith(PROFILE_EXTENSION):
+                continue
+            requests[route] += 1
+            with open(os.path.join(route_dir, file_name),
+                      encoding='utf-8') as file:
+                for line in file:
+                    stack, _, count = line.rstrip('\n').rpartition(' ')
+                    if stack and count.isdigit():
+                        stacks[f'{route};{stack}'] += int(count)
+    return stacks, requests
+
+
+def get_top_functions(stacks):
+    """Собственные (лист стека) и общие (есть в стеке) сэмплы функций."""
+    own, total = Counter(), Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(';')[1:]
+        if not frames:
+            continue
+        own[frames[-1]] += count
+        for frame in set(frames):
+            total[frame] += count
+    return own, total
+
+
+class Command(BaseCommand):
+    help = (
+        'Сводка профилей запросов: самые затратные функции и общий '
+        'collapsed-файл для flamegraph.pl или speedscope'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dir', default=settings.PROFILING_DIR,
+            help='Каталог профилей',
+        )
+        parser.add_argument(
+            '--route', action='append', dest='routes',
+            help='Только этот маршрут (можно несколько раз)',
+        )
+        parser.add_argument('--top', type=int, default=20)
+        parser.add_argument(
+            '--output', help='Записать объединённые стеки в файл',
+        )
+
+    def handle(self, *args, **options):
+        if not os.path.isdir(options['dir']):
+            raise CommandError(f'Нет каталога {options["dir"]}')
+        stacks, requests = read_profiles(options['dir'], options['routes'])
+        samples = sum(stacks.values())
+        if not samples:
+            raise CommandError('Профилей нет')
+
+        self.stdout.write(f'{"маршрут":<40}{"запросов":>10}{"сэмплов":>10}')
+        route_samples = Counter()
+        for stack, count in stacks.items():
+            route_samples[stack.split(';', 1)[0]] += count
+        for route, count in route_samples.most_common():
+            self.stdout.write(f'{route:<40}{requests[route]:>10}{count:>10}')
+
+        own, total = get_top_functions(stacks)
+        for title, counter in (('Собственное время', own),
+                               ('Общее время', total)):
+            self.stdout.write(f'\n{title}:')
+            for frame, count in counter.most_common(options['top']):
+                self.stdout.write(
+                    f'{count / samples:>7.1%}{count:>8}  {frame}'
+                )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                for stack, count in sorted(stacks.items()):
+                    file.write(f'{stack} {count}\n')
+            self.stdout.write(self.style.SUCCESS(
+                f'Стеки записаны в {options["output"]}'
+            ))
@@ -0,0 +1,32 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.profiling import (PROFILE_HEADER, PROFILE_TOKEN_MAX_AGE,
+                           make_profile_token)
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Подписанный заголовок для профилирования запросов сотрудника'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+
+    def handle(self, *args, **options):
+        # Без SECRET_KEY в окружении у каждого процесса свой случайный
+        # ключ, и подпись этой команды веб-воркеры не примут.
+        if not os.getenv('SECRET_KEY'):
+            raise CommandError(
+                'Задайте SECRET_KEY в окружении: со случайным ключом '
+                'заголовок не пройдёт проверку в веб-процессах'
+            )
+        user = User.objects.filter(
+            username=options['username'], is_staff=True, is_active=True
+        ).first()
+        if user is None:
+            raise CommandError('Нет активного сотрудника с таким именем')
+        self.stdout.write(f'{PROFILE_HEADER}: {make_profile_token(user)}')
+        self.stdout.write(
+            f'Действует {PROFILE_TOKEN_MAX_AGE // 60} мин', self.style.WARNING
+        )
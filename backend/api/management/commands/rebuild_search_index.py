@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe
+from recipes.search import index_recipes
+
+
+class Command(BaseCommand):
+    help = 'Перестроение поискового индекса рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Количество рецептов в одной пачке',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        ids = list(Recipe.objects.order_by('pk').values_list('pk', flat=True))
+        for start in range(0, len(ids), batch_size):
+            index_recipes(ids[start:start + batch_size])
+            self.stdout.write(
+                f'\rПроиндексировано: {min(start + batch_size, len(ids))}'
+                f'/{len(ids)}',
+                ending=''
+            )
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS('Индекс перестроен'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from recipes.shopping_list import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Пересборка агрегированных списков покупок из корзин'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', type=int, action='append', dest='user_ids',
+            help='id пользователя (можно указать несколько раз)',
+        )
+
+    def handle(self, *args, **options):
+        items = rebuild(options['user_ids'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Списки покупок пересобраны, позиций: {items}')
+        )
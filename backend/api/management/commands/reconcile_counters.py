@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from recipes.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = 'Сверка денормализованных счётчиков с фактическими данными'
+
+    def handle(self, *args, **options):
+        for counter, fixed in reconcile_counters().items():
+            style = self.style.WARNING if fixed else self.style.SUCCESS
+            self.stdout.write(style(f'{counter}: исправлено {fixed}'))
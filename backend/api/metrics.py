@@ -0,0 +1,281 @@
+import hmac
+import json
+import logging
+import os
+import time
+from bisect import bisect_left
+from tempfile import NamedTemporaryFile
+from threading import Lock
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse, HttpResponseForbidden
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+HISTOGRAMS = {
+    'request_duration_seconds': (
+        DURATION_BUCKETS, 'Время обработки запроса'
+    ),
+    'sql_duration_seconds': (
+        DURATION_BUCKETS, 'Суммарное время SQL-запросов за запрос'
+    ),
+    'sql_queries': (QUERY_BUCKETS, 'Число SQL-запросов за запрос'),
+}
+SNAPSHOT_INTERVAL = 5
+METRIC_PREFIX = 'foodgram_'
+
+
+def get_route(request):
+    """Имя обработчика: UserViewSet.subscriptions, redirect_short_link."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    view = match.func
+    view_class = getattr(view, 'cls', None) or getattr(
+        view, 'view_class', None
+    )
+    if view_class is None:
+        return getattr(view, '__name__', match.view_name)
+    actions = getattr(view, 'actions', None) or {}
+    action = actions.get(request.method.lower(), request.method.lower())
+    return f'{view_class.__name__}.{action}'
+
+
+def is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class MetricsRegistry:
+    """
+    Гистограммы по маршрутам в памяти процесса. Если задан
+    SQL_METRICS_DIR, процесс раз в SNAPSHOT_INTERVAL секунд сохраняет
+    свой снимок туда, а /metrics складывает снимки всех живых процессов.
+    """
+
+    def __init__(self):
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._lock = Lock()
+        self._routes = {}
+        self._saved_at = 0
+
+    def observe(self, route, values):
+        now = time.monotonic()
+        with self._lock:
+            histograms = self._routes.get(route)
+            if histograms is None:
+                histograms = self._routes[route] = {
+                    name: {
+                        'buckets': [0] * (len(buckets) + 1),
+                        'sum': 0.0,
+                        'count': 0,
+                    }
+                    for name, (buckets, _) in HISTOGRAMS.items()
+                }
+            for name, value in values.items():
+                histogram = histograms[name]
+                histogram['buckets'][
+                    bisect_left(HISTOGRAMS[name][0], value)
+                ] += 1
+                histogram['sum'] += value
+                histogram['count'] += 1
+            save = settings.SQL_METRICS_DIR and (
+                now - self._saved_at > SNAPSHOT_INTERVAL
+            )
+            if save:
+                self._saved_at = now
+        if save:
+            try:
+                self.save_snapshot()
+            except OSError as error:
+                logger.warning('Не удалось сохранить снимок метрик: %s', error)
+
+    def snapshot(self):
+        with self._lock:
+            return json.loads(json.dumps(self._routes))
+
+    def save_snapshot(self):
+        directory = settings.SQL_METRICS_DIR
+        os.makedirs(directory, exist_ok=True)
+        with NamedTemporaryFile(
+            'w', dir=directory, suffix='.tmp', delete=False
+        ) as file:
+            json.dump(self.snapshot(), file)
+        os.replace(file.name, os.path.join(directory, f'{os.getpid()}.json'))
+
+    def collect(self):
+        """Снимки всех процессов плюс текущее состояние этого."""
+        snapshots = [self.snapshot()]
+        directory = settings.SQL_METRICS_DIR
+        if directory and os.path.isdir(directory):
+            for file_name in os.listdir(directory):
+                pid, _, extension = file_name.partition('.')
+                if extension != 'json' or not pid.isdigit():
+                    continue
+                if int(pid) == os.getpid():
+                    continue
+                path = os.path.join(directory, file_name)
+                if not is_alive(int(pid)):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                    continue
+                try:
+                    with open(path) as file:
+                        snapshots.append(json.load(file))
+                except (OSError, ValueError):
+                    continue
+        merged = {}
+        for snapshot in snapshots:
+            for route, histograms in snapshot.items():
+                target = merged.setdefault(route, {})
+                for name, histogram in histograms.items():
+                    total = target.setdefault(name, {
+                        'buckets': [0] * len(histogram['buckets']),
+                        'sum': 0.0,
+                        'count': 0,
+                    })
+                    total['buckets'] = [
+                        a + b for a, b in
+                        zip(total['buckets'], histogram['buckets'])
+                    ]
+                    total['sum'] += histogram['sum']
+                    total['count'] += histogram['count']
+        return merged
+
+    def render(self):
+        """Текстовый формат Prometheus."""
+        merged = self.collect()
+        lines = []
+        for name, (buckets, description) in HISTOGRAMS.items():
+            metric = METRIC_PREFIX + name
+            lines.append(f'# HELP {metric} {description}')
+            lines.append(f'# TYPE {metric} histogram')
+            for route in sorted(merged):
+                histogram = merged[route].get(name)
+                if histogram is None:
+                    continue
+                label = route.replace('\\', '\\\\').replace('"', '\\"')
+                cumulative = 0
+                for bound, count in zip(
+                    (*buckets, '+Inf'), histogram['buckets']
+                ):
+                    cumulative += count
+                    lines.append(
+                        f'{metric}_bucket{{route="{label}",le="{bound}"}} '
+                        f'{cumulative}'
+                    )
+                lines.append(
+                    f'{metric}_sum{{route="{label}"}} {histogram["sum"]}'
+                )
+                lines.append(
+                    f'{metric}_count{{route="{label}"}} {histogram["count"]}'
+                )
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+class QueryRecorder:
+    """execute_wrapper: число, суммарное время и самый медленный запрос."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.slowest = (0.0, None)
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.count += 1
+            self.duration += duration
+            if duration > self.slowest[0]:
+                self.slowest = (duration, sql)
+
+
+class SQLMetricsMiddleware:
+    """
+    Считает SQL-запросы каждого запроса и копит гистограммы по
+    маршрутам; при SQL_METRICS_SERVER_TIMING добавляет Server-Timing
+    (кроме потоковых ответов: заголовки уходят раньше тела).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.SQL_METRICS_ENABLED:
+            return self.get_response(request)
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        if response.streaming:
+            # Запросы потоковых ответов (выгрузка списка покупок)
+            # выполняются при отдаче тела: учитываем их по её окончании.
+            response.streaming_content = self.stream(
+                response.streaming_content, request, recorder, started
+            )
+            return response
+        duration = self.record(request, recorder, started)
+        if settings.SQL_METRICS_SERVER_TIMING:
+            response['Server-Timing'] = (
+                f'db;dur={recorder.duration * 1000:.1f};'
+                f'desc="{recorder.count} queries", '
+                f'app;dur={duration * 1000:.1f}'
+            )
+        return response
+
+    def stream(self, content, request, recorder, started):
+        try:
+            with connection.execute_wrapper(recorder):
+                yield from content
+        finally:
+            self.record(request, recorder, started)
+
+    def record(self, request, recorder, started):
+        duration = time.perf_counter() - started
+        route = get_route(request)
+        registry.observe(route, {
+            'request_duration_seconds': duration,
+            'sql_duration_seconds': recorder.duration,
+            'sql_queries': recorder.count,
+        })
+        slowest_duration, slowest_sql = recorder.slowest
+        if slowest_duration > settings.SQL_SLOW_QUERY_SECONDS:
+            logger.warning(
+                'Медленный запрос в %s (%.3f с): %s',
+                route, slowest_duration, slowest_sql,
+            )
+        return duration
+
+
+def metrics_view(request):
+    """Без METRICS_TOKEN метрики закрыты."""
+    token = settings.METRICS_TOKEN
+    if not token or not hmac.compare_digest(
+        request.headers.get('Authorization', '').encode(),
+        f'Bearer {token}'.encode(),
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        registry.render(), content_type='text/plain; version=0.0.4'
+    )
@@ -0,0 +1,172 @@
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core import signing
+
+from users.models import User
+from .metrics import get_route
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'X-Profile-Token'
+PROFILE_SALT = 'api.profiling'
+PROFILE_TOKEN_MAX_AGE = 60 * 60
+SAMPLE_INTERVAL = 0.005
+MAX_FILES_PER_ROUTE = 50
+PROFILE_EXTENSION = '.collapsed'
+
+
+def make_profile_token(user):
+    """Значение заголовка X-Profile-Token для сотрудника."""
+    return signing.dumps(user.pk, salt=PROFILE_SALT)
+
+
+def get_token_user_id(token):
+    try:
+        return signing.loads(
+            token, salt=PROFILE_SALT, max_age=PROFILE_TOKEN_MAX_AGE
+        )
+    except signing.BadSignature:
+        return None
+
+
+def get_frame_name(frame):
+    code = frame.f_code
+    module = frame.f_globals.get('__name__', code.co_filename)
+    return f'{module}:{getattr(code, "co_qualname", code.co_name)}'
+
+
+def collapse(frame):
+    """Стек в формате collapsed: от корня к листу через «;»."""
+    names = []
+    while frame is not None:
+        names.append(get_frame_name(frame).replace(';', ':'))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class StackSampler:
+    """
+    Один фоновый поток раз в interval секунд снимает стеки потоков,
+    которые сейчас профилируются. Без таких потоков он ждёт и не
+    тратит время; новый поток будит его сразу, чтобы короткие запросы
+    тоже попадали в выборку.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._stacks = {}
+        self._lock = threading.Lock()
+        self._active = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def start(self, thread_id):
+        with self._lock:
+            self._stacks[thread_id] = Counter()
+            self._active.set()
+            self._wakeup.set()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def stop(self, thread_id):
+        with self._lock:
+            stacks = self._stacks.pop(thread_id, Counter())
+            if not self._stacks:
+                self._active.clear()
+        return stacks
+
+    def _run(self):
+        while True:
+            self._active.wait()
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, stacks in self._stacks.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        stacks[collapse(frame)] += 1
+            del frames
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+
+
+sampler = StackSampler(SAMPLE_INTERVAL)
+
+
+def write_profile(route, stacks):
+    """
+    Файл <PROFILING_DIR>/<маршрут>/<время>-<pid>.collapsed; старше
+    MAX_FILES_PER_ROUTE последних файлов маршрута удаляются.
+    """
+    directory = os.path.join(
+        settings.PROFILING_DIR, re.sub(r'[^\w.-]', '_', route)
+    )
+    os.makedirs(directory, exist_ok=True)
+    name = f'{time.time_ns()}-{os.getpid()}{PROFILE_EXTENSION}'
+    with open(os.path.join(directory, name), 'w', encoding='utf-8') as file:
+        for stack, count in stacks.items():
+            file.write(f'{stack} {count}\n')
+    files = sorted(
+        file_name for file_name in os.listdir(directory)
+        if file_name.endswith(PROFILE_EXTENSION)
+    )
+    for file_name in files[:-MAX_FILES_PER_ROUTE]:
+        try:
+            os.remove(os.path.join(directory, file_name))
+        except FileNotFoundError:
+            pass
+    return name
+
+
+class ProfilingMiddleware:
+    """
+    Профилирует долю PROFILING_SAMPLE_RATE запросов и запросы сотрудников
+    с подписанным заголовком X-Profile-Token.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def should_profile(self, request):
+        rate = settings.PROFILING_SAMPLE_RATE
+        if rate and random.random() < rate:
+            return True
+        token = request.headers.get(PROFILE_HEADER)
+        if not token:
+            return False
+        user_id = get_token_user_id(token)
+        return user_id is not None and User.objects.filter(
+            pk=user_id, is_staff=True, is_active=True
+        ).exists()
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+        thread_id = threading.get_ident()
+        sampler.start(thread_id)
+        try:
+            response = self.get_response(request)
+        finally:
+            stacks = sampler.stop(thread_id)
+        if not stacks:
+            return response
+        try:
+            name = write_profile(get_route(request), stacks)
+        except OSError as error:
+            logger.warning('Не удалось сохранить профиль: %s', error)
+            return response
+        if PROFILE_HEADER in request.headers:
+            response['X-Profile-File'] = name
+        return response
@@ -0,0 +1,105 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from api.v1.cache import bump_recipe_versions, bump_user_state_generation
+from api.v1.short_links import recipe_ids
+from recipes.cache import (INGREDIENTS_GENERATION, RECIPE_RENDER_GENERATION,
+                           RECIPES_GENERATION, SHORT_LINKS_GENERATION,
+                           TAGS_GENERATION, bump_generation)
+from recipes.images import variants_ready
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            ShoppingCart, Tag)
+from users.models import Follow, User
+
+USER_RENDERED_FIELDS = frozenset(
+    ('username', 'email', 'first_name', 'last_name', 'avatar')
+)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def invalidate_recipe(instance, **kwargs):
+    bump_recipe_versions(instance.pk)
+    bump_generation(RECIPES_GENERATION)
+
+
+@receiver(post_delete, sender=Recipe)
+def invalidate_short_links(**kwargs):
+    # Другие процессы увидят новое поколение, этот сбрасывает LRU сразу.
+    bump_generation(SHORT_LINKS_GENERATION)
+    transaction.on_commit(recipe_ids.clear)
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def invalidate_recipe_ingredients(instance, **kwargs):
+    bump_recipe_versions(instance.recipe_id)
+    bump_generation(RECIPES_GENERATION)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipe_tags(instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        bump_recipe_versions(instance.pk)
+    elif pk_set:
+        bump_recipe_versions(*pk_set)
+    else:
+        bump_generation(RECIPE_RENDER_GENERATION)
+    bump_generation(RECIPES_GENERATION)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tags(**kwargs):
+    bump_generation(
+        TAGS_GENERATION, RECIPES_GENERATION, RECIPE_RENDER_GENERATION
+    )
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredients(**kwargs):
+    bump_generation(
+        INGREDIENTS_GENERATION, RECIPES_GENERATION, RECIPE_RENDER_GENERATION
+    )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_recipes_on_user_change(update_fields=None, **kwargs):
+    if update_fields and not USER_RENDERED_FIELDS.intersection(update_fields):
+        return
+    bump_generation(RECIPES_GENERATION, RECIPE_RENDER_GENERATION)
+
+
+@receiver(variants_ready, sender=Recipe)
+def invalidate_recipe_image_variants(pk, **kwargs):
+    bump_recipe_versions(pk)
+    bump_generation(RECIPES_GENERATION)
+
+
+@receiver(variants_ready, sender=User)
+def invalidate_recipes_on_avatar_variants(**kwargs):
+    bump_generation(RECIPES_GENERATION, RECIPE_RENDER_GENERATION)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+def invalidate_favorites_count(instance, **kwargs):
+    # favorites_count есть в ответах списка и рецепта, в том числе
+    # закешированных для анонимных пользователей.
+    bump_recipe_versions(instance.recipe_id)
+    bump_generation(RECIPES_GENERATION)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_user_state(instance, **kwargs):
+    bump_user_state_generation(instance.user_id)
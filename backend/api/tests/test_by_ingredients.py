@@ -0,0 +1,68 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.coverage_index import schedule_coverage_update
+from recipes.models import Ingredient, Recipe, RecipeIngredient
+from users.models import User
+
+URL = '/api/recipes/by-ingredients/'
+
+
+class ByIngredientsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass'
+        )
+        self.ingredients = [
+            Ingredient.objects.create(name=f'ингредиент {index}',
+                                      measurement_unit='г')
+            for index in range(3)
+        ]
+        self.recipes = [
+            Recipe.objects.create(
+                author=author, name=f'рецепт {count}', text='текст',
+                image='recipes/images/test.jpg', cooking_time=10,
+            )
+            for count in range(1, 4)
+        ]
+        # Как в RecipeWriteSerializer: индекс обновляется после коммита.
+        with self.captureOnCommitCallbacks(execute=True):
+            for count, recipe in enumerate(self.recipes, 1):
+                RecipeIngredient.objects.bulk_create(
+                    RecipeIngredient(
+                        recipe=recipe, ingredient=ingredient, amount=1
+                    )
+                    for ingredient in self.ingredients[:count]
+                )
+                schedule_coverage_update(recipe.pk)
+        self.client = APIClient()
+
+    def get(self, **params):
+        return self.client.get(URL, {
+            'ingredients': self.ingredients[0].pk, 'limit': 2, **params
+        })
+
+    def test_ranked_by_coverage(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(
+            [(item['id'], item['coverage'])
+             for item in response.data['results']],
+            [(self.recipes[0].pk, 1.0), (self.recipes[1].pk, 0.5)],
+        )
+
+    def test_cursor_pagination_falls_back_to_pages(self):
+        response = self.get(pagination='cursor')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+        response = self.get(pagination='cursor', page=2)
+        self.assertEqual(
+            [item['id'] for item in response.data['results']],
+            [self.recipes[2].pk],
+        )
@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe
+from recipes.search import index_recipes
+from users.models import User
+
+URL = '/api/recipes/'
+
+
+class CursorPaginationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass'
+        )
+        now = timezone.now()
+        self.recipes = []
+        for index in range(5):
+            recipe = Recipe.objects.create(
+                author=author, name=f'пирог {index}', text='текст',
+                image='recipes/images/test.jpg', cooking_time=10,
+            )
+            # Одинаковые даты у двух рецептов проверяют порядок по id.
+            Recipe.objects.filter(pk=recipe.pk).update(
+                pub_date=now - timedelta(days=min(index, 3))
+            )
+            self.recipes.append(recipe)
+        index_recipes([recipe.pk for recipe in self.recipes])
+        self.client = APIClient()
+
+    def get_ids(self, response):
+        return [item['id'] for item in response.data['results']]
+
+    def test_pages_follow_pub_date_and_id(self):
+        response = self.client.get(URL, {'pagination': 'cursor', 'limit': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('count', response.data)
+        self.assertIsNone(response.data['previous'])
+        ids = self.get_ids(response)
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            ids += self.get_ids(response)
+        self.assertEqual(ids, [
+            self.recipes[0].pk, self.recipes[1].pk, self.recipes[2].pk,
+            self.recipes[4].pk, self.recipes[3].pk,
+        ])
+
+        response = self.client.get(response.data['previous'])
+        self.assertEqual(
+            self.get_ids(response), [self.recipes[2].pk, self.recipes[4].pk]
+        )
+
+    def test_invalid_cursor(self):
+        response = self.client.get(
+            URL, {'pagination': 'cursor', 'cursor': 'broken'}
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_search_keeps_page_pagination(self):
+        response = self.client.get(
+            URL, {'pagination': 'cursor', 'search': 'пирог', 'limit': 2}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 5)
+        self.assertIn('page=2', response.data['next'])
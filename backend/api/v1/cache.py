@@ -0,0 +1,159 @@
+import time
+from datetime import datetime, timezone
+from functools import wraps
+from hashlib import md5
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+from recipes.cache import (RECIPE_RENDER_GENERATION, bump_generation,
+                           get_generation)
+from .constants import RECIPE_VERSION_TIMEOUT, RESPONSE_CACHE_TIMEOUT
+
+RESPONSE_CACHE_HITS = 'response-cache:hits'
+RESPONSE_CACHE_MISSES = 'response-cache:misses'
+
+
+def get_user_state_generation(user):
+    """Поколение избранного, корзины и подписок пользователя."""
+    return get_generation(f'user-state:{user.pk}')
+
+
+def bump_user_state_generation(user_id):
+    bump_generation(f'user-state:{user_id}')
+
+
+def generation_to_datetime(generation):
+    return datetime.fromtimestamp(generation / 10 ** 9, tz=timezone.utc)
+
+
+def generation_etag(name):
+    """Пара функций etag/last_modified для django condition()."""
+    def etag(request, *args, **kwargs):
+        return f'{name}-{get_generation(name)}'
+
+    def last_modified(request, *args, **kwargs):
+        return generation_to_datetime(get_generation(name))
+
+    return {'etag_func': etag, 'last_modified_func': last_modified}
+
+
+def _get_recipe_stamps(request, pk):
+    stamps = [
+        get_generation(RECIPE_RENDER_GENERATION),
+        get_recipe_versions([pk])[pk],
+    ]
+    if request.user.is_authenticated:
+        stamps.append(get_user_state_generation(request.user))
+    return stamps
+
+
+def recipe_etag(request, pk=None, **kwargs):
+    user_id = request.user.pk if request.user.is_authenticated else 0
+    stamps = '-'.join(map(str, _get_recipe_stamps(request, pk)))
+    return f'recipe-{pk}-{user_id}-{stamps}'
+
+
+def recipe_last_modified(request, pk=None, **kwargs):
+    return generation_to_datetime(max(_get_recipe_stamps(request, pk)))
+
+
+def get_recipe_versions(recipe_ids):
+    """
+    Версии рецептов для ETag и ключей рендера. Ключи живут
+    RECIPE_VERSION_TIMEOUT: запросы к несуществующим pk не копятся
+    в кеше, а пропавшая версия просто заменяется новой.
+    """
+    keys = {pk: f'recipe-version:{pk}' for pk in recipe_ids}
+    cached = cache.get_many(keys.values())
+    versions = {pk: cached.get(key) for pk, key in keys.items()}
+    missing = {
+        keys[pk]: time.time_ns() for pk, version in versions.items()
+        if version is None
+    }
+    if missing:
+        cache.set_many(missing, RECIPE_VERSION_TIMEOUT)
+        versions.update({
+            pk: missing[key] for pk, key in keys.items() if key in missing
+        })
+    return versions
+
+
+def bump_recipe_versions(*recipe_ids):
+    def bump():
+        now = time.time_ns()
+        cache.set_many(
+            {f'recipe-version:{pk}': now for pk in recipe_ids},
+            RECIPE_VERSION_TIMEOUT,
+        )
+    transaction.on_commit(bump)
+
+
+def get_recipe_render_keys(recipe_ids, request=None):
+    """Ключи общего (не зависящего от пользователя) рендера рецептов."""
+    generation = get_generation(RECIPE_RENDER_GENERATION)
+    host = request.get_host() if request is not None else ''
+    return {
+        pk: f'recipe-render:{host}:{generation}:{pk}:{version}'
+        for pk, version in get_recipe_versions(recipe_ids).items()
+    }
+
+
+def _incr(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, None)
+
+
+def get_response_cache_stats():
+    hits = cache.get(RESPONSE_CACHE_HITS, 0)
+    misses = cache.get(RESPONSE_CACHE_MISSES, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else 0.0,
+    }
+
+
+def get_response_cache_key(request, generation):
+    query = urlencode(sorted(
+        (key, value)
+        for key in request.query_params
+        for value in request.query_params.getlist(key)
+    ))
+    digest = md5(
+        f'{request.get_host()}{request.path}?{query}'.encode()
+    ).hexdigest()
+    return f'response:{generation}:{digest}'
+
+
+def cache_anonymous_response(generation_name):
+    """Кеширует данные ответа GET для анонимных пользователей."""
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            if request.user.is_authenticated:
+                return view_method(self, request, *args, **kwargs)
+
+            key = get_response_cache_key(
+                request, get_generation(generation_name)
+            )
+            data = cache.get(key)
+            if data is not None:
+                _incr(RESPONSE_CACHE_HITS)
+                response = Response(data)
+                response['X-Cache'] = 'HIT'
+                return response
+
+            _incr(RESPONSE_CACHE_MISSES)
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data, RESPONSE_CACHE_TIMEOUT)
+            response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
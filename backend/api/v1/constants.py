@@ -1 +1,20 @@
 DEFAULT_PAGE_LIMIT = 6
+PAGINATION_QUERY_PARAM = 'pagination'
+CURSOR_PAGINATION = 'cursor'
+COUNT_CACHE_TIMEOUT = 30
+ESTIMATED_COUNT_THRESHOLD = 10000
+RESPONSE_CACHE_TIMEOUT = 60 * 10
+RECIPE_VERSION_TIMEOUT = 60 * 60
+EXPORT_CHUNK_SIZE = 2000
+SHORT_LINK_CACHE_SIZE = 50000
+SHORT_LINK_FLUSH_INTERVAL = 10
+SHORT_LINK_GENERATION_CHECK = 1
+IMAGE_MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+IMAGE_MAX_PIXELS = 40_000_000
+IMAGE_SPOOL_SIZE = 1024 * 1024
+BASE64_CHUNK_SIZE = 64 * 1024
+IMAGE_FORMATS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp', 'GIF': 'gif'}
+BENCHMARK_ITERATIONS = 20
+BENCHMARK_WARMUP = 2
+BENCHMARK_THRESHOLD = 0.2
+BENCHMARK_MIN_DELTA_MS = 1.0
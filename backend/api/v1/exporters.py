@@ -0,0 +1,76 @@
+import csv
+import json
+from abc import ABC, abstractmethod
+
+from rest_framework.negotiation import DefaultContentNegotiation
+
+
+class IgnoreFormatNegotiation(DefaultContentNegotiation):
+    """Не даёт DRF трактовать ?format= как выбор рендерера."""
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+class ShoppingListExporter(ABC):
+    """
+    Потоковый экспорт списка покупок. Принимает итератор словарей
+    с ключами name, measurement_unit и total_amount.
+    """
+
+    content_type = None
+    extension = None
+
+    @abstractmethod
+    def render(self, items):
+        """Итератор строк файла."""
+
+
+class TextExporter(ShoppingListExporter):
+    content_type = 'text/plain; charset=utf-8'
+    extension = 'txt'
+
+    def render(self, items):
+        for number, item in enumerate(items):
+            yield (
+                ('\n' if number else '')
+                + f'{item["name"]} ({item["measurement_unit"]})'
+                f' — {item["total_amount"]}'
+            )
+
+
+class CsvExporter(ShoppingListExporter):
+    content_type = 'text/csv; charset=utf-8'
+    extension = 'csv'
+
+    def render(self, items):
+        writer = csv.writer(_Echo())
+        yield writer.writerow(('name', 'measurement_unit', 'total_amount'))
+        for item in items:
+            yield writer.writerow((
+                item['name'], item['measurement_unit'], item['total_amount']
+            ))
+
+
+class JsonExporter(ShoppingListExporter):
+    content_type = 'application/json; charset=utf-8'
+    extension = 'json'
+
+    def render(self, items):
+        yield '['
+        for number, item in enumerate(items):
+            yield (',' if number else '') + json.dumps(
+                item, ensure_ascii=False
+            )
+        yield ']'
+
+
+SHOPPING_LIST_EXPORTERS = {
+    exporter.extension: exporter
+    for exporter in (TextExporter, CsvExporter, JsonExporter)
+}
@@ -0,0 +1,105 @@
+import base64
+import binascii
+from tempfile import SpooledTemporaryFile
+
+from django.core.files import File
+from PIL import Image
+from rest_framework.fields import Field, FileField, ImageField
+
+from recipes.constants import IMAGE_VARIANT_FORMATS, IMAGE_VARIANTS
+from recipes.images import get_variants_field
+from .constants import (BASE64_CHUNK_SIZE, IMAGE_FORMATS, IMAGE_MAX_PIXELS,
+                        IMAGE_MAX_UPLOAD_SIZE, IMAGE_SPOOL_SIZE)
+
+
+class Base64ImageField(ImageField):
+    """
+    Изображение в data URI. base64 декодируется частями во временный
+    файл, размер проверяется до декодирования, формат и размеры — по
+    заголовку Pillow.
+    """
+
+    default_error_messages = {
+        'invalid_base64': 'Некорректное изображение в base64.',
+        'too_large': (
+            'Размер изображения больше '
+            f'{IMAGE_MAX_UPLOAD_SIZE // (1024 * 1024)} МБ.'
+        ),
+        'invalid_format': 'Допустимые форматы: {formats}.',
+        'too_many_pixels': 'Слишком большое разрешение изображения.',
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) and data.startswith('data:image'):
+            # Pillow уже проверил файл в decode(), повторная проверка
+            # ImageField не нужна.
+            return FileField.to_internal_value(self, self.decode(data))
+        return super().to_internal_value(data)
+
+    def decode(self, data):
+        payload = data.partition(';base64,')[2]
+        if not payload or len(payload) % 4:
+            self.fail('invalid_base64')
+        if len(payload) // 4 * 3 > IMAGE_MAX_UPLOAD_SIZE:
+            self.fail('too_large')
+        file = SpooledTemporaryFile(max_size=IMAGE_SPOOL_SIZE)
+        try:
+            for start in range(0, len(payload), BASE64_CHUNK_SIZE):
+                file.write(base64.b64decode(
+                    payload[start:start + BASE64_CHUNK_SIZE], validate=True
+                ))
+        except binascii.Error:
+            file.close()
+            self.fail('invalid_base64')
+        file.seek(0)
+        try:
+            with Image.open(file) as image:
+                image_format = image.format
+                pixels = image.width * image.height
+                image.verify()
+        except (OSError, SyntaxError, ValueError,
+                Image.DecompressionBombError):
+            file.close()
+            self.fail('invalid_image')
+        if image_format not in IMAGE_FORMATS:
+            file.close()
+            self.fail('invalid_format', formats=', '.join(IMAGE_FORMATS))
+        if pixels > IMAGE_MAX_PIXELS:
+            file.close()
+            self.fail('too_many_pixels')
+        file.seek(0)
+        return File(file, name=f'image.{IMAGE_FORMATS[image_format]}')
+
+
+class ImageVariantsField(Field):
+    """
+    URL уменьшенных копий изображения по размерам и форматам. Пока
+    копии не готовы, вместо них отдаётся URL оригинала.
+    """
+
+    def __init__(self, image_field, **kwargs):
+        self.image_field = image_field
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        image = getattr(instance, self.image_field)
+        if not image:
+            return None
+        variants = getattr(instance, get_variants_field(self.image_field))
+        request = self.context.get('request')
+
+        def get_url(name):
+            url = image.storage.url(name)
+            return request.build_absolute_uri(url) if request else url
+
+        original = get_url(image.name)
+        return {
+            variant: {
+                key: get_url(name) if name else original
+                for key in IMAGE_VARIANT_FORMATS
+                for name in (variants.get(variant, {}).get(key),)
+            }
+            for variant in IMAGE_VARIANTS
+        }
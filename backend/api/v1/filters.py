@@ -1,7 +1,26 @@
 import django_filters
+from django.db.models import F
 from django_filters import rest_framework as filters
+from rest_framework.filters import BaseFilterBackend
 
-from recipes.models import Ingredient, Recipe
+from recipes.cache import TAGS_GENERATION, get_generation
+from recipes.models import Ingredient, Recipe, Tag
+from recipes.search import search_recipes
+
+_tag_ids = {'generation': None, 'by_slug': {}}
+
+
+def get_tag_ids():
+    """Словарь slug -> id тега, кешируется в процессе до смены тегов."""
+    generation = get_generation(TAGS_GENERATION)
+    if _tag_ids['generation'] != generation:
+        _tag_ids['by_slug'] = dict(Tag.objects.values_list('slug', 'id'))
+        _tag_ids['generation'] = generation
+    return _tag_ids['by_slug']
+
+
+def get_tag_choices():
+    return [(slug, slug) for slug in get_tag_ids()]
 
 
 class IngredientFilter(django_filters.FilterSet):
@@ -13,7 +32,10 @@ class IngredientFilter(django_filters.FilterSet):
 
 
 class RecipeFilter(django_filters.FilterSet):
-    tags = django_filters.AllValuesMultipleFilter(field_name='tags__slug')
+    tags = django_filters.MultipleChoiceFilter(
+        choices=get_tag_choices,
+        method='filter_tags',
+    )
     author = django_filters.NumberFilter(field_name='author__id')
     is_favorited = django_filters.CharFilter(
         method='filter_is_favorited',
@@ -38,6 +60,15 @@ class RecipeFilter(django_filters.FilterSet):
             return value.lower() in ('true', '1', 't', 'yes', 'y')
         return bool(value)
 
+    def filter_tags(self, queryset, name, value):
+        tag_ids = [get_tag_ids()[slug] for slug in value]
+        mask = Recipe.get_tags_mask(tag_ids)
+        if mask.bit_count() != len(tag_ids):
+            return queryset.filter(tags__id__in=tag_ids).distinct()
+        return queryset.alias(
+            matched_tags=F('tags_mask').bitand(mask)
+        ).filter(matched_tags__gt=0)
+
     def filter_is_favorited(self, queryset, name, value):
         val = self._str_to_bool(value)
         user = self.request.user
@@ -55,3 +86,15 @@ class RecipeFilter(django_filters.FilterSet):
         if val:
             return queryset.filter(shopping_cart__user=user)
         return queryset.exclude(shopping_cart__user=user)
+
+
+class RecipeSearchFilter(BaseFilterBackend):
+    """Полнотекстовый поиск по названию, описанию и ингредиентам."""
+
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        return search_recipes(queryset, query)
@@ -1,8 +1,186 @@
-from rest_framework.pagination import PageNumberPagination
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from hashlib import md5
 
-from .constants import DEFAULT_PAGE_LIMIT
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (BasePagination, LimitOffsetPagination,
+                                       PageNumberPagination, _positive_int)
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .constants import (COUNT_CACHE_TIMEOUT, DEFAULT_PAGE_LIMIT,
+                        ESTIMATED_COUNT_THRESHOLD)
+
+
+def get_estimated_count(queryset):
+    """Оценка планировщика PostgreSQL для таблицы без фильтров."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql' or queryset.query.where:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples FROM pg_class WHERE relname = %s',
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] < ESTIMATED_COUNT_THRESHOLD:
+        return None
+    return int(row[0])
+
+
+def get_cached_count(queryset):
+    """
+    Возвращает (count, exact) для queryset.
+
+    Точный COUNT кешируется на COUNT_CACHE_TIMEOUT секунд по SQL-запросу
+    без аннотаций, то есть по нормализованному набору фильтров: ключ
+    зависит от пользователя, только если применён фильтр
+    is_favorited/is_in_shopping_cart. Для больших таблиц без фильтров
+    в PostgreSQL используется оценка reltuples.
+    """
+    queryset = queryset.order_by().values('pk')
+    estimate = get_estimated_count(queryset)
+    if estimate is not None:
+        return estimate, False
+    sql, params = queryset.query.sql_with_params()
+    key = 'count:{}:{}'.format(
+        queryset.db, md5(f'{sql}{params}'.encode()).hexdigest()
+    )
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, COUNT_CACHE_TIMEOUT)
+    return count, True
+
+
+class CachedCountPaginator(Paginator):
+    count_exact = True
+
+    @cached_property
+    def count(self):
+        if not isinstance(self.object_list, QuerySet):
+            return super().count
+        count, self.count_exact = get_cached_count(self.object_list)
+        return count
 
 
 class FoodgramLimitPagination(PageNumberPagination):
+    django_paginator_class = CachedCountPaginator
     page_size_query_param = 'limit'
     page_size = DEFAULT_PAGE_LIMIT
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data['count_exact'] = self.page.paginator.count_exact
+        return response
+
+
+class FoodgramLimitOffsetPagination(LimitOffsetPagination):
+    count_exact = True
+
+    def get_count(self, queryset):
+        if not isinstance(queryset, QuerySet):
+            return super().get_count(queryset)
+        count, self.count_exact = get_cached_count(queryset)
+        return count
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data['count_exact'] = self.count_exact
+        return response
+
+
+class FoodgramCursorPagination(BasePagination):
+    """Keyset-пагинация рецептов по (pub_date, id) без COUNT и OFFSET."""
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'limit'
+    page_size = DEFAULT_PAGE_LIMIT
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        queryset = queryset.order_by('-pub_date', '-id')
+        reverse = False
+
+        if cursor is not None:
+            reverse, pub_date, pk = cursor
+            if reverse:
+                queryset = queryset.filter(
+                    Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, id__gt=pk)
+                ).order_by('pub_date', 'id')
+            else:
+                queryset = queryset.filter(
+                    Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, id__lt=pk)
+                )
+
+        results = list(queryset[:page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+
+        self.page = results
+        self.has_next = bool(results) and (reverse or has_more)
+        self.has_previous = bool(results) and (
+            has_more if reverse else cursor is not None
+        )
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, recipe, reverse):
+        token = f'{int(reverse)}|{recipe.pub_date.isoformat()}|{recipe.pk}'
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            remove_query_param(url, 'page'),
+            self.cursor_query_param,
+            urlsafe_b64encode(token.encode()).decode(),
+        )
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            reverse, pub_date, pk = (
+                urlsafe_b64decode(encoded.encode()).decode().split('|')
+            )
+            pub_date = parse_datetime(pub_date)
+            if pub_date is None:
+                raise ValueError
+            return bool(int(reverse)), pub_date, int(pk)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
@@ -1,28 +1,51 @@
-import base64
+from collections import OrderedDict
 
-from django.core.files.base import ContentFile
+from django.core.cache import cache
 from django.db import transaction
+from django.db.models import Manager, prefetch_related_objects
 from rest_framework.serializers import (CurrentUserDefault, HiddenField,
-                                        ImageField, ModelSerializer,
+                                        ListSerializer, ModelSerializer,
                                         PrimaryKeyRelatedField, ReadOnlyField,
                                         SerializerMethodField, ValidationError)
 
+from recipes.counters import change_counter
+from recipes.coverage_index import schedule_coverage_update
 from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
                             ShoppingCart, Tag)
+from recipes.search import schedule_index
+from recipes.shopping_list import apply_recipe_change
 from users.models import Follow, User
+from .cache import bump_recipe_versions, get_recipe_render_keys
+from .fields import Base64ImageField, ImageVariantsField
 
 
-class Base64ImageField(ImageField):
-    def to_internal_value(self, data):
-        if isinstance(data, str) and data.startswith('data:image'):
-            format, imgstr = data.split(';base64,')
-            ext = format.split('/')[-1]
-            data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
-        return super().to_internal_value(data)
+def get_followed_ids(request):
+    """Id авторов, на которых подписан пользователь, один запрос на request."""
+    if not hasattr(request, '_followed_ids'):
+        request._followed_ids = set(
+            request.user.follower.values_list('following_id', flat=True)
+        )
+    return request._followed_ids
+
+
+def is_subscribed(request, author_id):
+    return bool(
+        request
+        and request.user.is_authenticated
+        and author_id in get_followed_ids(request)
+    )
+
+
+def get_recipes_limit(request):
+    recipes_limit = request.query_params.get('recipes_limit')
+    if recipes_limit and recipes_limit.isdigit():
+        return int(recipes_limit)
+    return None
 
 
 class UserSerializer(ModelSerializer):
     avatar = Base64ImageField(required=False, allow_null=True)
+    avatar_variants = ImageVariantsField('avatar')
     is_subscribed = SerializerMethodField()
 
     class Meta:
@@ -35,6 +58,7 @@ class UserSerializer(ModelSerializer):
             'last_name',
             'is_subscribed',
             'avatar',
+            'avatar_variants',
             'password',
         )
         extra_kwargs = {
@@ -42,12 +66,7 @@ class UserSerializer(ModelSerializer):
         }
 
     def get_is_subscribed(self, obj):
-        request = self.context.get('request')
-        return bool(
-            request
-            and request.user.is_authenticated
-            and request.user.follower.filter(following=obj).exists()
-        )
+        return is_subscribed(self.context.get('request'), obj.pk)
 
 
 class UserAvatarSerializer(ModelSerializer):
@@ -90,7 +109,21 @@ class RecipeIngredientWriteSerializer(ModelSerializer):
         fields = ('id', 'amount')
 
 
+class RecipeListSerializer(ListSerializer):
+    def to_representation(self, data):
+        recipes = list(data.all() if isinstance(data, Manager) else data)
+        shared = self.child.get_shared_representations(recipes)
+        return [
+            self.child.apply_user_fields(recipe, shared[recipe.pk])
+            for recipe in recipes
+        ]
+
+
 class RecipeReadSerializer(ModelSerializer):
+    """
+    Общая часть рецепта кешируется по id и версии рецепта, поля,
+    зависящие от пользователя, накладываются поверх при каждом рендере.
+    """
 
     author = UserSerializer(read_only=True)
     tags = TagSerializer(many=True)
@@ -100,6 +133,7 @@ class RecipeReadSerializer(ModelSerializer):
     is_favorited = SerializerMethodField()
     is_in_shopping_cart = SerializerMethodField()
     image = Base64ImageField()
+    image_variants = ImageVariantsField('image')
 
     class Meta:
         model = Recipe
@@ -112,12 +146,58 @@ class RecipeReadSerializer(ModelSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'image_variants',
             'text',
             'cooking_time',
+            'favorites_count',
         )
         read_only_fields = fields
+        list_serializer_class = RecipeListSerializer
+
+    def to_representation(self, instance):
+        return self.apply_user_fields(
+            instance, self.get_shared_representations([instance])[instance.pk]
+        )
+
+    def get_shared_representations(self, recipes):
+        keys = get_recipe_render_keys(
+            [recipe.pk for recipe in recipes], self.context.get('request')
+        )
+        cached = cache.get_many(keys.values())
+        shared = {
+            pk: cached[key] for pk, key in keys.items() if key in cached
+        }
+        missing = [recipe for recipe in recipes if recipe.pk not in shared]
+        if missing:
+            prefetch_related_objects(
+                missing, 'author', 'tags', 'recipe_ingredients__ingredient'
+            )
+            rendered = {
+                recipe.pk: super(RecipeReadSerializer, self)
+                .to_representation(recipe)
+                for recipe in missing
+            }
+            cache.set_many(
+                {keys[pk]: data for pk, data in rendered.items()}
+            )
+            shared.update(rendered)
+        return shared
+
+    def apply_user_fields(self, recipe, shared):
+        data = OrderedDict(shared)
+        data['author'] = OrderedDict(
+            shared['author'],
+            is_subscribed=is_subscribed(
+                self.context.get('request'), recipe.author_id
+            ),
+        )
+        data['is_favorited'] = self.get_is_favorited(recipe)
+        data['is_in_shopping_cart'] = self.get_is_in_shopping_cart(recipe)
+        return data
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         request = self.context.get('request')
         return bool(
             request
@@ -126,6 +206,8 @@ class RecipeReadSerializer(ModelSerializer):
         )
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         request = self.context.get('request')
         return bool(
             request
@@ -218,49 +300,52 @@ class RecipeWriteSerializer(ModelSerializer):
             for item in ingredients
         ]
         RecipeIngredient.objects.bulk_create(objs)
+        change_counter(
+            Recipe.objects.filter(pk=recipe.pk), 'ingredients_count', len(objs)
+        )
+        apply_recipe_change(
+            recipe.pk, {obj.ingredient_id: obj.amount for obj in objs}
+        )
+        bump_recipe_versions(recipe.pk)
+        schedule_index(recipe.pk)
+        schedule_coverage_update(recipe.pk)
 
 
 class ShortRecipeSerializer(ModelSerializer):
+    image_variants = ImageVariantsField('image')
+
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_variants', 'cooking_time')
 
 
 class SubscriptionSerializer(UserSerializer):
     recipes = SerializerMethodField()
-    recipes_count = SerializerMethodField()
 
     class Meta(UserSerializer.Meta):
         fields = (
             UserSerializer.Meta.fields
-            + ('is_subscribed', 'recipes', 'recipes_count')
+            + ('is_subscribed', 'recipes', 'recipes_count', 'followers_count')
         )
+        read_only_fields = ('recipes_count', 'followers_count')
 
     def get_is_subscribed(self, obj):
-        request = self.context.get('request')
-        return bool(
-            request
-            and request.user.is_authenticated
-            and Follow.objects.filter(
-                user=request.user,
-                following=obj
-            ).exists()
-        )
+        if self.context.get('all_subscribed'):
+            return True
+        return super().get_is_subscribed(obj)
 
     def get_recipes(self, obj):
-        request = self.context.get('request')
-        recipes_limit = request.query_params.get(
-            'recipes_limit')
-        recipes = obj.recipes.all()
-
-        if recipes_limit and recipes_limit.isdigit():
-            recipes = recipes[:int(recipes_limit)]
+        recipes_by_author = self.context.get('recipes_by_author')
+        if recipes_by_author is not None:
+            recipes = recipes_by_author.get(obj.pk, [])
+        else:
+            recipes = obj.recipes.all()
+            recipes_limit = get_recipes_limit(self.context.get('request'))
+            if recipes_limit is not None:
+                recipes = recipes[:recipes_limit]
 
         return ShortRecipeSerializer(recipes, many=True).data
 
-    def get_recipes_count(self, obj):
-        return obj.recipes.count()
-
 
 class FollowSerializer(ModelSerializer):
     user = HiddenField(default=CurrentUserDefault())
@@ -287,6 +372,10 @@ class FollowSerializer(ModelSerializer):
         return data
 
     def to_representation(self, instance):
+        # Счётчики обновлены через F() уже после загрузки объекта.
+        instance.following.refresh_from_db(
+            fields=('recipes_count', 'followers_count')
+        )
         return SubscriptionSerializer(
             instance.following,
             context=self.context
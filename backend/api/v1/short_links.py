@@ -0,0 +1,181 @@
+import atexit
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict
+
+from django.db import DatabaseError, close_old_connections, connection
+from django.db.models import F
+from django.http import Http404, HttpResponseRedirect
+from django.views.decorators.http import require_safe
+
+from recipes.cache import SHORT_LINKS_GENERATION, get_generation
+from recipes.models import Recipe
+from recipes.short_links import decode
+from .constants import (SHORT_LINK_CACHE_SIZE, SHORT_LINK_FLUSH_INTERVAL,
+                        SHORT_LINK_GENERATION_CHECK)
+
+SHORT_LINK_PATH = re.compile(r'^/s/([0-9A-Za-z]{1,10})/?$')
+
+
+class RecipeIdCache:
+    """
+    LRU «короткий код -> id рецепта» в памяти процесса. Удаление рецепта
+    меняет поколение SHORT_LINKS_GENERATION; его LRU сверяет не чаще раза
+    в SHORT_LINK_GENERATION_CHECK секунд, чтобы попадание обходилось без
+    обращения к кешу.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = None
+        self._checked_at = 0
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def _check_generation(self):
+        now = time.monotonic()
+        if now - self._checked_at < SHORT_LINK_GENERATION_CHECK:
+            return
+        self._checked_at = now
+        generation = get_generation(SHORT_LINKS_GENERATION)
+        if generation != self._generation:
+            self.clear()
+            self._generation = generation
+
+    def get(self, short_hash):
+        self._check_generation()
+        with self._lock:
+            recipe_id = self._items.get(short_hash)
+            if recipe_id is not None:
+                self._items.move_to_end(short_hash)
+            return recipe_id
+
+    def set(self, short_hash, recipe_id):
+        self._check_generation()
+        with self._lock:
+            self._items[short_hash] = recipe_id
+            self._items.move_to_end(short_hash)
+            if len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+
+class VisitCounter:
+    """
+    Копит переходы по коротким ссылкам в памяти и раз в interval секунд
+    записывает их фоновым потоком: по одному UPDATE на каждое
+    встретившееся число переходов.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+        atexit.register(self.flush)
+
+    def _reset(self):
+        self._visits = Counter()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add(self, recipe_id):
+        with self._lock:
+            self._visits[recipe_id] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            visits, self._visits = self._visits, Counter()
+        if not visits:
+            return
+        recipe_ids = defaultdict(list)
+        for recipe_id, count in visits.items():
+            recipe_ids[count].append(recipe_id)
+        try:
+            for count, ids in recipe_ids.items():
+                Recipe.objects.filter(pk__in=ids).update(
+                    short_link_visits=F('short_link_visits') + count
+                )
+        except DatabaseError:
+            with self._lock:
+                self._visits.update(visits)
+        finally:
+            connection.close()
+
+
+recipe_ids = RecipeIdCache(SHORT_LINK_CACHE_SIZE)
+visit_counter = VisitCounter(SHORT_LINK_FLUSH_INTERVAL)
+
+
+def find_recipe_id(short_hash):
+    recipe_id = recipe_ids.get(short_hash)
+    if recipe_id is not None:
+        return recipe_id
+    recipe_id = decode(short_hash)
+    if recipe_id is None or not Recipe.objects.filter(pk=recipe_id).exists():
+        recipe_id = Recipe.objects.filter(
+            legacy_short_hash=short_hash
+        ).values_list('id', flat=True).first()
+    if recipe_id is not None:
+        recipe_ids.set(short_hash, recipe_id)
+    return recipe_id
+
+
+def get_recipe_path(recipe_id):
+    return f'/recipes/{recipe_id}/'
+
+
+@require_safe
+def redirect_short_link(request, short_hash):
+    recipe_id = find_recipe_id(short_hash)
+    if recipe_id is None:
+        raise Http404
+    visit_counter.add(recipe_id)
+    return HttpResponseRedirect(get_recipe_path(recipe_id))
+
+
+class ShortLinkApplication:
+    """
+    WSGI-обёртка: отвечает на GET/HEAD /s/<код>/ редиректом сама,
+    без middleware, сессий и DRF. Остальное передаёт в application.
+    """
+
+    def __init__(self, application):
+        self.application = application
+
+    def __call__(self, environ, start_response):
+        match = SHORT_LINK_PATH.match(environ.get('PATH_INFO', ''))
+        if match is None or environ['REQUEST_METHOD'] not in ('GET', 'HEAD'):
+            return self.application(environ, start_response)
+        recipe_id = recipe_ids.get(match[1])
+        if recipe_id is None:
+            # Как request_started/request_finished у обычного запроса.
+            close_old_connections()
+            try:
+                recipe_id = find_recipe_id(match[1])
+            finally:
+                close_old_connections()
+        if recipe_id is None:
+            start_response('404 Not Found', [
+                ('Content-Type', 'text/plain; charset=utf-8'),
+                ('Content-Length', '0'),
+            ])
+            return []
+        visit_counter.add(recipe_id)
+        start_response('302 Found', [
+            ('Location', get_recipe_path(recipe_id)),
+            ('Content-Length', '0'),
+        ])
+        return []
@@ -1,31 +1,45 @@
-from django.db.models import Sum
-from django.http import HttpResponse, HttpResponseRedirect
+from django.db.models import Exists, F, OuterRef
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet as DjoserViewSet
 from rest_framework import filters, status
-from rest_framework.decorators import action, api_view
-from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 
-from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
-                            ShoppingCart, Tag)
+from recipes.cache import (INGREDIENTS_GENERATION, RECIPES_GENERATION,
+                           TAGS_GENERATION)
+from recipes.coverage_index import coverage_index
+from recipes.ingredient_index import ingredient_index
+from recipes.models import (Favorite, Ingredient, Recipe, ShoppingCart,
+                            ShoppingListItem, Tag)
 from users.models import Follow, User
-from .filters import IngredientFilter, RecipeFilter
-from .pagination import FoodgramLimitPagination
+from .cache import (cache_anonymous_response, generation_etag, recipe_etag,
+                    recipe_last_modified)
+from .constants import (CURSOR_PAGINATION, EXPORT_CHUNK_SIZE,
+                        PAGINATION_QUERY_PARAM)
+from .exporters import SHOPPING_LIST_EXPORTERS, IgnoreFormatNegotiation
+from .filters import IngredientFilter, RecipeFilter, RecipeSearchFilter
+from .pagination import (FoodgramCursorPagination,
+                         FoodgramLimitOffsetPagination,
+                         FoodgramLimitPagination)
 from .permissions import IsAuthorOrReadOnly
 from .serializers import (FavoriteSerializer, FollowSerializer,
                           IngredientReadSerializer, RecipeReadSerializer,
                           RecipeWriteSerializer, ShoppingCartSerializer,
                           SubscriptionSerializer, TagSerializer,
-                          UserAvatarSerializer, UserSerializer)
+                          UserAvatarSerializer, UserSerializer,
+                          get_recipes_limit)
 
 
 class UserViewSet(DjoserViewSet):
     queryset = User.objects.all()
-    pagination_class = LimitOffsetPagination
+    pagination_class = FoodgramLimitOffsetPagination
     lookup_field = 'id'
     search_fields = ('username',)
     filter_backends = [filters.SearchFilter]
@@ -67,7 +81,7 @@ class UserViewSet(DjoserViewSet):
     def delete_avatar(self, request):
         user = request.user
         if user.avatar:
-            user.avatar.delete()
+            user.avatar = None
             user.save()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
@@ -83,7 +97,14 @@ class UserViewSet(DjoserViewSet):
         serializer = SubscriptionSerializer(
             page,
             many=True,
-            context={'request': request},
+            context={
+                'request': request,
+                'all_subscribed': True,
+                'recipes_by_author': Recipe.latest_by_author(
+                    [author.pk for author in page],
+                    get_recipes_limit(request),
+                ),
+            },
         )
         return self.get_paginated_response(serializer.data)
 
@@ -122,19 +143,63 @@ class UserViewSet(DjoserViewSet):
 
 
 class RecipeViewSet(ModelViewSet):
-    queryset = Recipe.objects.all().prefetch_related(
-        'tags', 'recipe_ingredients__ingredient', 'author')
+    queryset = Recipe.objects.all()
     pagination_class = FoodgramLimitPagination
-    filter_backends = (DjangoFilterBackend, filters.SearchFilter,)
+    filter_backends = (DjangoFilterBackend, RecipeSearchFilter,)
     filterset_class = RecipeFilter
 
+    @property
+    def paginator(self):
+        # Подбор по ингредиентам упорядочен по покрытию, а поиск — по
+        # релевантности, а не по дате, поэтому курсор по (pub_date, id)
+        # к ним неприменим.
+        params = (
+            self.request.query_params if self.request is not None else {}
+        )
+        if (
+            params.get(PAGINATION_QUERY_PARAM) == CURSOR_PAGINATION
+            and self.action != 'by_ingredients'
+            and not params.get(RecipeSearchFilter.search_param, '').strip()
+        ):
+            self.pagination_class = FoodgramCursorPagination
+        return super().paginator
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+        if not user.is_authenticated:
+            return queryset
+        return queryset.annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+        )
+
+    @cache_anonymous_response(RECIPES_GENERATION)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @method_decorator(condition(
+        etag_func=recipe_etag, last_modified_func=recipe_last_modified
+    ))
+    @cache_anonymous_response(RECIPES_GENERATION)
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        patch_vary_headers(response, ('Authorization',))
+        return response
+
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
             return RecipeWriteSerializer
         return RecipeReadSerializer
 
     def get_permissions(self):
-        if self.action in ('list', 'retrieve', 'get_short_link'):
+        if self.action in (
+            'list', 'retrieve', 'get_short_link', 'by_ingredients'
+        ):
             permission_classes = [AllowAny]
         else:
             permission_classes = [IsAuthenticated, IsAuthorOrReadOnly]
@@ -143,6 +208,44 @@ class RecipeViewSet(ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='by-ingredients'
+    )
+    def by_ingredients(self, request):
+        try:
+            ingredient_ids = {
+                int(value)
+                for param in request.query_params.getlist('ingredients')
+                for value in param.split(',') if value
+            }
+        except ValueError:
+            return Response(
+                {'ingredients': 'Укажите id ингредиентов через запятую.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not ingredient_ids:
+            return Response(
+                {'ingredients': 'Добавьте хотя бы один ингредиент.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        page = self.paginate_queryset(coverage_index.search(ingredient_ids))
+        recipes = self.get_queryset().in_bulk(
+            [recipe_id for recipe_id, _ in page]
+        )
+        page = [
+            (recipes[recipe_id], coverage)
+            for recipe_id, coverage in page if recipe_id in recipes
+        ]
+        data = self.get_serializer(
+            [recipe for recipe, _ in page], many=True
+        ).data
+        for item, (_, coverage) in zip(data, page):
+            item['coverage'] = round(coverage, 2)
+        return self.get_paginated_response(data)
+
     @action(
         detail=True,
         methods=['get'],
@@ -223,46 +326,54 @@ class RecipeViewSet(ModelViewSet):
         detail=False,
         methods=['get'],
         permission_classes=[IsAuthenticated],
+        content_negotiation_class=IgnoreFormatNegotiation,
     )
     def download_shopping_cart(self, request):
-        recipes = Recipe.objects.filter(shopping_cart__user=request.user)
+        export_format = request.query_params.get('format', 'txt')
+        exporter = SHOPPING_LIST_EXPORTERS.get(export_format)
+        if exporter is None:
+            return Response(
+                {'format': 'Поддерживаемые форматы: '
+                           + ', '.join(SHOPPING_LIST_EXPORTERS)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
         ingredients = (
-            RecipeIngredient.objects.filter(recipe__in=recipes)
-            .values('ingredient__name', 'ingredient__measurement_unit')
-            .annotate(total_amount=Sum('amount'))
-            .order_by('ingredient__name')
+            ShoppingListItem.objects.filter(user=request.user)
+            .values(
+                'total_amount',
+                name=F('ingredient__name'),
+                measurement_unit=F('ingredient__measurement_unit'),
+            )
+            .order_by('name')
         )
 
-        lines = [
-            f'{item["ingredient__name"]} '
-            f'({item["ingredient__measurement_unit"]})'
-            f' — {item["total_amount"]}'
-            for item in ingredients
-        ]
-
-        response = HttpResponse(
-            '\n'.join(lines), content_type='text/plain; charset=utf-8'
+        response = StreamingHttpResponse(
+            exporter().render(
+                ingredients.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+            ),
+            content_type=exporter.content_type,
         )
         response['Content-Disposition'] = (
-            'attachment; filename="shopping_list.txt"'
+            f'attachment; filename="shopping_list.{exporter.extension}"'
         )
         return response
 
 
-@api_view(['GET'])
-def redirect_short_link(request, short_hash):
-    recipe = get_object_or_404(Recipe, short_hash=short_hash)
-    return HttpResponseRedirect(
-        request.build_absolute_uri(f'/recipes/{recipe.id}/')
-    )
-
-
 class TagViewSet(ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (AllowAny,)
     pagination_class = None
 
+    @method_decorator(condition(**generation_etag(TAGS_GENERATION)))
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @method_decorator(condition(**generation_etag(TAGS_GENERATION)))
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
 
 class IngridientViewSet(ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
@@ -271,3 +382,14 @@ class IngridientViewSet(ReadOnlyModelViewSet):
     pagination_class = None
     filter_backends = (DjangoFilterBackend, filters.SearchFilter,)
     filterset_class = IngredientFilter
+
+    @method_decorator(condition(**generation_etag(INGREDIENTS_GENERATION)))
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @method_decorator(condition(**generation_etag(INGREDIENTS_GENERATION)))
+    def list(self, request, *args, **kwargs):
+        ingredients = ingredient_index.search(
+            request.query_params.get('name', '')
+        )
+        return Response(self.get_serializer(ingredients, many=True).data)
@@ -32,6 +32,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.metrics.SQLMetricsMiddleware',
+    'api.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -77,6 +79,35 @@ DATABASES = {
     }
 }
 
+# Локальный кеш годится только для разработки: в продакшене нужен общий
+# для всех процессов (см. docker-compose, проверка api.W001).
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'foodgram'),
+    }
+}
+
+# Ключ перестановки коротких ссылок: после смены ключа старые ссылки
+# перестают открываться.
+SHORT_LINK_KEY = os.getenv('SHORT_LINK_KEY', 'foodgram')
+
+# Метрики SQL по маршрутам (/metrics). Без METRICS_DIR каждый процесс
+# отдаёт только свои данные; с ним снимки процессов складываются.
+# Без METRICS_TOKEN /metrics закрыт.
+SQL_METRICS_ENABLED = os.getenv('SQL_METRICS_ENABLED', 'True') == 'True'
+SQL_METRICS_SERVER_TIMING = os.getenv('SERVER_TIMING') == 'True'
+SQL_METRICS_DIR = os.getenv('METRICS_DIR', '')
+SQL_SLOW_QUERY_SECONDS = float(os.getenv('SQL_SLOW_QUERY_SECONDS', 0.5))
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Профилирование запросов: доля случайных запросов (0 — только по
+# подписанному заголовку сотрудника) и каталог collapsed-файлов.
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', 0))
+PROFILING_DIR = os.getenv('PROFILING_DIR', str(BASE_DIR / 'profiles'))
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -112,6 +143,7 @@ STATIC_ROOT = BASE_DIR / 'collected_static'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = '/backend/media'
+DEFAULT_FILE_STORAGE = 'recipes.storage.ContentAddressedStorage'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -3,7 +3,8 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
-from api.v1.views import redirect_short_link
+from api.metrics import metrics_view
+from api.v1.short_links import redirect_short_link
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -12,6 +13,7 @@ urlpatterns = [
          redirect_short_link,
          name='short-link-redirect',
          ),
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 if settings.DEBUG:
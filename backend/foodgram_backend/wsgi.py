@@ -7,6 +7,7 @@ For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/wsgi/
 """
 
+import logging
 import os
 
 from django.core.wsgi import get_wsgi_application
@@ -14,3 +15,12 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram_backend.settings')
 
 application = get_wsgi_application()
+
+from api.checks import check_shared_cache  # noqa: E402
+from api.v1.short_links import ShortLinkApplication  # noqa: E402
+
+# gunicorn не запускает системные проверки: предупреждаем в лог.
+for warning in check_shared_cache(None):
+    logging.getLogger(__name__).warning('%s %s', warning.msg, warning.hint)
+
+application = ShortLinkApplication(application)
@@ -1,5 +1,8 @@
 from django.contrib import admin
+from django.db.models import Case, IntegerField, When
 
+from .constants import COOKING_TIME_RANGES
+from .ingredient_index import ingredient_index
 from .models import (Favorite, Ingredient, Recipe, RecipeIngredient,
                      ShoppingCart, Tag)
 
@@ -13,6 +16,18 @@ class IngredientAdmin(admin.ModelAdmin):
     list_per_page = 50
     ordering = ('name',)
 
+    def get_search_results(self, request, queryset, search_term):
+        if not request.path.endswith('/autocomplete/') or not search_term:
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        ids = [entry.id for entry in ingredient_index.search(search_term)]
+        rank = Case(
+            *(When(pk=pk, then=position) for position, pk in enumerate(ids)),
+            output_field=IntegerField(),
+        )
+        return queryset.filter(pk__in=ids).order_by(rank), False
+
 
 class RecipeIngredientInline(admin.TabularInline):
     model = RecipeIngredient
@@ -23,6 +38,28 @@ class RecipeIngredientInline(admin.TabularInline):
     autocomplete_fields = ('ingredient',)
 
 
+class CookingTimeFilter(admin.SimpleListFilter):
+    """Фиксированные диапазоны вместо выборки всех значений из базы."""
+
+    title = 'Время приготовления'
+    parameter_name = 'cooking_time'
+
+    def lookups(self, request, model_admin):
+        return [
+            (f'{low}-{high or ""}', label)
+            for low, high, label in COOKING_TIME_RANGES
+        ]
+
+    def queryset(self, request, queryset):
+        if self.value() not in dict(self.lookup_choices):
+            return queryset
+        low, high = self.value().split('-')
+        queryset = queryset.filter(cooking_time__gte=int(low))
+        if high:
+            queryset = queryset.filter(cooking_time__lt=int(high))
+        return queryset
+
+
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
     list_display = (
@@ -31,12 +68,16 @@ class RecipeAdmin(admin.ModelAdmin):
         'favorites_count'
     )
     list_display_links = ('id', 'name')
+    list_select_related = ('author',)
     search_fields = ('name', 'author__username', 'author__email')
-    list_filter = ('tags', 'cooking_time', 'pub_date')
-    readonly_fields = ('pub_date', 'favorites_count_display')
+    list_filter = ('tags', CookingTimeFilter, 'pub_date')
+    readonly_fields = (
+        'pub_date', 'favorites_count_display', 'short_link_visits'
+    )
     filter_horizontal = ('tags',)
     inlines = (RecipeIngredientInline,)
     list_per_page = 30
+    show_full_result_count = False
     date_hierarchy = 'pub_date'
 
     fieldsets = (
@@ -47,25 +88,22 @@ class RecipeAdmin(admin.ModelAdmin):
             'fields': ('cooking_time', 'tags')
         }),
         ('Статистика', {
-            'fields': ('pub_date', 'favorites_count_display'),
+            'fields': (
+                'pub_date', 'favorites_count_display', 'short_link_visits'
+            ),
             'classes': ('collapse',)
         }),
     )
 
-    def ingredients_count(self, obj):
-        return obj.recipe_ingredients.count()
-    ingredients_count.short_description = 'Кол-во ингредиентов'
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('tags')
 
     def tags_list(self, obj):
         return ", ".join([tag.name for tag in obj.tags.all()])
     tags_list.short_description = 'Теги'
 
-    def favorites_count(self, obj):
-        return obj.favorited_by.count()
-    favorites_count.short_description = 'В избранном'
-
     def favorites_count_display(self, obj):
-        return obj.favorited_by.count()
+        return obj.favorites_count
     favorites_count_display.short_description = ('Количество добавлений'
                                                  ' в избранное')
 
@@ -74,14 +112,17 @@ class RecipeAdmin(admin.ModelAdmin):
 class RecipeIngredientAdmin(admin.ModelAdmin):
     list_display = ('id', 'recipe', 'ingredient', 'amount', 'measurement_unit')
     list_display_links = ('id', 'recipe')
+    list_select_related = ('recipe', 'ingredient')
     search_fields = ('recipe__name', 'ingredient__name')
     list_filter = ('ingredient__measurement_unit',)
     list_per_page = 50
+    show_full_result_count = False
     autocomplete_fields = ('recipe', 'ingredient')
 
     def measurement_unit(self, obj):
         return obj.ingredient.measurement_unit
     measurement_unit.short_description = 'Единица измерения'
+    measurement_unit.admin_order_field = 'ingredient__measurement_unit'
 
 
 @admin.register(Tag)
@@ -93,25 +134,25 @@ class TagAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('name',)}
     ordering = ('name',)
 
-    def recipes_count(self, obj):
-        return obj.recipes.count()
-    recipes_count.short_description = 'Кол-во рецептов'
-
 
 @admin.register(Favorite)
 class FavoriteAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'recipe')
     list_display_links = ('id', 'user')
+    list_select_related = ('user', 'recipe')
     search_fields = ('user__username', 'user__email', 'recipe__name')
     list_per_page = 50
+    show_full_result_count = False
 
 
 @admin.register(ShoppingCart)
 class ShoppingCartAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'recipe')
     list_display_links = ('id', 'user')
+    list_select_related = ('user', 'recipe')
     search_fields = ('user__username', 'user__email', 'recipe__name')
     list_per_page = 50
+    show_full_result_count = False
 
 
 admin.site.site_header = 'Администрирование Foodgram'
@@ -0,0 +1,52 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+# Поколения кешей: меняются после записи, общие для api и команд
+# управления через общий кеш Django.
+RECIPES_GENERATION = 'recipes'
+RECIPE_RENDER_GENERATION = 'recipe-render'
+TAGS_GENERATION = 'tags'
+INGREDIENTS_GENERATION = 'ingredients'
+RECIPE_INGREDIENTS_GENERATION = 'recipe-ingredients'
+RECIPE_INGREDIENTS_LOG_GENERATION = 'recipe-ingredients-log'
+SHORT_LINKS_GENERATION = 'short-links'
+
+
+def get_generation(name):
+    """
+    Текущее поколение кеша name.
+
+    Поколение хранится как время в наносекундах, поэтому при вытеснении
+    ключа оно только растёт и старые записи не оживают.
+    """
+    key = f'generation:{name}'
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, time.time_ns(), None)
+        generation = cache.get(key)
+    return generation
+
+
+def set_generation(*names):
+    now = time.time_ns()
+    cache.set_many({f'generation:{name}': now for name in names}, None)
+    return now
+
+
+def increment_generation(name):
+    """
+    Следующее поколение name без скачка по времени: так нумеруются
+    записи журналов изменений. Если ключ вытеснен, номер скачет вперёд.
+    """
+    get_generation(name)
+    try:
+        return cache.incr(f'generation:{name}')
+    except ValueError:
+        return set_generation(name)
+
+
+def bump_generation(*names):
+    """Сбрасывает поколения после коммита текущей транзакции."""
+    transaction.on_commit(lambda: set_generation(*names))
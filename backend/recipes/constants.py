@@ -7,4 +7,29 @@ MIN_AMOUNT = 1
 MAX_AMOUNT = 32000
 NAME_MAX_LENGTH = 150
 MAX_RECIPE_NAME_LENGTH = 256
-SHORT_ID_DEFAULT_LENGTH = 6
+SHORT_LINK_LENGTH = 7
+SHORT_LINK_ROUNDS = 3
+TAG_MASK_BITS = 63
+SEARCH_TERM_MAX_LENGTH = 64
+COOKING_TIME_RANGES = (
+    (MIN_COOKING_TIME, 15, 'до 15 минут'),
+    (15, 30, '15–30 минут'),
+    (30, 60, '30–60 минут'),
+    (60, None, 'больше часа'),
+)
+IMAGE_VARIANTS_DIR = 'variants'
+IMAGE_VARIANTS = {
+    'thumb': (320, 320),
+    'medium': (960, 960),
+}
+IMAGE_VARIANT_FORMATS = {
+    'webp': ('WEBP', 'webp'),
+    'jpeg': ('JPEG', 'jpg'),
+}
+IMAGE_VARIANT_QUALITY = 82
+IMAGE_WORKERS = 2
+CONTENT_STORAGE_DIR = 'files'
+IMPORT_BATCH_SIZE = 1000
+IMPORT_READ_SIZE = 64 * 1024
+COVERAGE_LOG_TIMEOUT = 24 * 60 * 60
+COVERAGE_LOG_MAX_REPLAY = 1000
@@ -0,0 +1,45 @@
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from users.models import Follow, User
+from .models import Favorite, Recipe, RecipeIngredient, Tag
+
+RECONCILE_BATCH_SIZE = 900
+
+
+def change_counter(queryset, field, delta):
+    """Атомарно меняет счётчик field на delta, не опуская его ниже нуля."""
+    queryset.update(**{field: Greatest(F(field) + delta, 0)})
+
+
+def _count(queryset, field):
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef('pk')}).order_by()
+        .values(field).annotate(total=Count('pk')).values('total')
+    ), Value(0))
+
+
+COUNTERS = (
+    (Recipe, 'favorites_count', Favorite.objects.all(), 'recipe'),
+    (Recipe, 'ingredients_count', RecipeIngredient.objects.all(), 'recipe'),
+    (User, 'recipes_count', Recipe.objects.all(), 'author'),
+    (User, 'followers_count', Follow.objects.all(), 'following'),
+    (Tag, 'recipes_count', Recipe.tags.through.objects.all(), 'tag'),
+)
+
+
+def reconcile_counters():
+    """Пересчитывает счётчики, возвращает {'Model.field': исправлено}."""
+    fixed = {}
+    for model, field, related, related_field in COUNTERS:
+        actual = _count(related, related_field)
+        drifted = list(
+            model.objects.annotate(actual=actual)
+            .exclude(**{field: F('actual')}).values_list('pk', flat=True)
+        )
+        for start in range(0, len(drifted), RECONCILE_BATCH_SIZE):
+            model.objects.filter(
+                pk__in=drifted[start:start + RECONCILE_BATCH_SIZE]
+            ).update(**{field: actual})
+        fixed[f'{model.__name__}.{field}'] = len(drifted)
+    return fixed
@@ -0,0 +1,135 @@
+from collections import Counter
+from threading import Lock
+
+from django.core.cache import cache
+
+from .cache import (RECIPE_INGREDIENTS_GENERATION,
+                    RECIPE_INGREDIENTS_LOG_GENERATION, get_generation,
+                    increment_generation)
+from .constants import COVERAGE_LOG_MAX_REPLAY, COVERAGE_LOG_TIMEOUT
+from .models import RecipeIngredient
+from .utils import on_commit_batch
+
+
+def get_log_key(sequence):
+    return f'{RECIPE_INGREDIENTS_LOG_GENERATION}:{sequence}'
+
+
+class RecipeCoverageIndex:
+    """
+    Инвертированный индекс ингредиент -> рецепты в памяти процесса.
+
+    Изменения рецептов применяются инкрементально и пишутся в журнал
+    в общем кеше, откуда их повторяют остальные процессы. Целиком индекс
+    перестраивается после смены поколения (массовая запись) или если
+    часть журнала потеряна.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._generation = None
+        self._sequence = None
+        self._postings = {}
+        self._recipes = {}
+
+    def _add(self, recipe_id, ingredient_ids):
+        self._recipes[recipe_id] = frozenset(ingredient_ids)
+        for ingredient_id in ingredient_ids:
+            self._postings.setdefault(ingredient_id, set()).add(recipe_id)
+
+    def _remove(self, recipe_id):
+        for ingredient_id in self._recipes.pop(recipe_id, ()):
+            recipes = self._postings[ingredient_id]
+            recipes.discard(recipe_id)
+            if not recipes:
+                del self._postings[ingredient_id]
+
+    def _apply(self, recipes):
+        for recipe_id, ingredient_ids in recipes.items():
+            self._remove(recipe_id)
+            if ingredient_ids:
+                self._add(recipe_id, ingredient_ids)
+
+    @staticmethod
+    def _load(recipe_ids=None):
+        """{recipe_id: [ingredient_id, ...]}; без recipe_ids — все рецепты."""
+        rows = RecipeIngredient.objects.values_list(
+            'recipe_id', 'ingredient_id'
+        )
+        recipes = {}
+        if recipe_ids is not None:
+            rows = rows.filter(recipe_id__in=recipe_ids)
+            recipes = {recipe_id: [] for recipe_id in recipe_ids}
+        for recipe_id, ingredient_id in rows.iterator():
+            recipes.setdefault(recipe_id, []).append(ingredient_id)
+        return recipes
+
+    def _changed_recipes(self, sequence):
+        """Рецепты из журнала после self._sequence; None, если он неполон."""
+        if self._sequence is None or not (
+            0 < sequence - self._sequence <= COVERAGE_LOG_MAX_REPLAY
+        ):
+            return None
+        keys = [
+            get_log_key(number)
+            for number in range(self._sequence + 1, sequence + 1)
+        ]
+        entries = cache.get_many(keys)
+        if len(entries) < len(keys):
+            return None
+        return set().union(*entries.values())
+
+    def _refresh(self):
+        generation = get_generation(RECIPE_INGREDIENTS_GENERATION)
+        sequence = get_generation(RECIPE_INGREDIENTS_LOG_GENERATION)
+        if generation == self._generation and sequence == self._sequence:
+            return
+        with self._lock:
+            if generation == self._generation:
+                if sequence == self._sequence:
+                    return
+                recipe_ids = self._changed_recipes(sequence)
+                if recipe_ids is not None:
+                    self._apply(self._load(recipe_ids))
+                    self._sequence = sequence
+                    return
+            self._postings, self._recipes = {}, {}
+            self._apply(self._load())
+            self._generation, self._sequence = generation, sequence
+
+    def update_recipes(self, recipe_ids):
+        recipes = self._load(recipe_ids)
+        sequence = increment_generation(RECIPE_INGREDIENTS_LOG_GENERATION)
+        cache.set(
+            get_log_key(sequence), list(recipes), COVERAGE_LOG_TIMEOUT
+        )
+        with self._lock:
+            self._apply(recipes)
+            if self._sequence is not None and (
+                sequence == self._sequence + 1
+            ):
+                self._sequence = sequence
+
+    def search(self, ingredient_ids):
+        """
+        Рецепты, где есть хотя бы один из ingredient_ids, отсортированные
+        по доле имеющихся ингредиентов: [(recipe_id, coverage), ...].
+        """
+        self._refresh()
+        matched = Counter()
+        with self._lock:
+            for ingredient_id in set(ingredient_ids):
+                matched.update(self._postings.get(ingredient_id, ()))
+            ranked = [
+                (recipe_id, count / len(self._recipes[recipe_id]), count)
+                for recipe_id, count in matched.items()
+            ]
+        ranked.sort(key=lambda item: (-item[1], -item[2], -item[0]))
+        return [(recipe_id, coverage) for recipe_id, coverage, _ in ranked]
+
+
+coverage_index = RecipeCoverageIndex()
+
+
+def schedule_coverage_update(*recipe_ids):
+    on_commit_batch(coverage_index.update_recipes, recipe_ids)
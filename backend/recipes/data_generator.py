@@ -0,0 +1,350 @@
+import csv
+import io
+import json
+import multiprocessing
+import random
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models import F, Max
+from PIL import Image
+
+from users.models import Follow, User
+from .constants import MAX_AMOUNT, MAX_COOKING_TIME, MIN_COOKING_TIME
+from .images import generate_variants
+from .models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                     ShoppingCart, StoredFile, Tag)
+from .short_links import encode
+from .storage import ContentAddressedStorage
+
+# Параметры распределений: популярность по закону Ципфа, число
+# избранного и подписок у пользователя — по Парето.
+ZIPF_EXPONENT = 1.1
+PARETO_ALPHA = 1.5
+MAX_RELATIONS = 1000
+START_DATE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+PERIOD_SECONDS = 365 * 24 * 60 * 60
+PASSWORD = 'password'
+FIRST_NAMES = ('Анна', 'Иван', 'Мария', 'Пётр', 'Ольга', 'Максим', 'Елена')
+LAST_NAMES = ('Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Соколов')
+ADJECTIVES = (
+    'Домашний', 'Быстрый', 'Летний', 'Пряный', 'Нежный', 'Сытный',
+    'Бабушкин', 'Постный', 'Праздничный', 'Острый',
+)
+DISHES = (
+    'пирог', 'суп', 'салат', 'плов', 'омлет', 'рагу', 'соус', 'кекс',
+    'борщ', 'гуляш', 'ризотто', 'хлеб',
+)
+SENTENCES = (
+    'Подготовьте все ингредиенты заранее.',
+    'Нагрейте духовку до 180 градусов.',
+    'Тщательно перемешайте до однородности.',
+    'Готовьте на среднем огне, периодически помешивая.',
+    'Подавайте горячим, посыпав зеленью.',
+    'Дайте блюду настояться перед подачей.',
+)
+
+# Общие данные для процессов пула; заполняются до fork.
+_context = {}
+
+
+def zipf_weights(size):
+    return list(accumulate(1 / rank ** ZIPF_EXPONENT
+                           for rank in range(1, size + 1)))
+
+
+def power_law_count(rng, mean, limit):
+    value = rng.paretovariate(PARETO_ALPHA) * mean * (
+        PARETO_ALPHA - 1
+    ) / PARETO_ALPHA
+    return min(int(value), limit // 2, MAX_RELATIONS)
+
+
+def weighted_sample(rng, population, cum_weights, count):
+    """count различных элементов с вероятностью по весам."""
+    count = min(count, len(population))
+    chosen = set()
+    while len(chosen) < count:
+        chosen.update(rng.choices(
+            population, cum_weights=cum_weights, k=count - len(chosen)
+        ))
+    return chosen
+
+
+def to_copy_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def write(model, objects, with_pk=True):
+    """
+    COPY в PostgreSQL, executemany в остальных базах. Значения пишутся
+    как есть, без pre_save полей (auto_now_add у pub_date).
+    """
+    fields = [
+        field for field in model._meta.concrete_fields
+        if with_pk or not field.primary_key
+    ]
+    table = connection.ops.quote_name(model._meta.db_table)
+    columns = ', '.join(
+        connection.ops.quote_name(field.column) for field in fields
+    )
+    with connection.cursor() as cursor:
+        if connection.vendor != 'postgresql':
+            cursor.executemany(
+                f'INSERT INTO {table} ({columns}) '
+                f'VALUES ({", ".join(["%s"] * len(fields))})',
+                [
+                    [field.get_db_prep_save(getattr(obj, field.attname),
+                                            connection)
+                     for field in fields]
+                    for obj in objects
+                ],
+            )
+            return
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for obj in objects:
+            writer.writerow([
+                to_copy_value(
+                    field.get_prep_value(getattr(obj, field.attname))
+                )
+                for field in fields
+            ])
+        buffer.seek(0)
+        cursor.copy_expert(
+            f'COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)', buffer
+        )
+
+
+def generate_users(rng, start, stop):
+    password = _context['password']
+    users = []
+    for pk in range(start, stop):
+        joined = START_DATE + timedelta(seconds=rng.randrange(PERIOD_SECONDS))
+        users.append(User(
+            id=pk,
+            username=f'user{pk}',
+            email=f'user{pk}@example.com',
+            first_name=rng.choice(FIRST_NAMES),
+            last_name=rng.choice(LAST_NAMES),
+            password=password,
+            date_joined=joined,
+        ))
+    write(User, users)
+
+
+def generate_recipes(rng, start, stop):
+    context = _context
+    recipes, recipe_tags, recipe_ingredients = [], [], []
+    authors = rng.choices(
+        context['user_ids'], cum_weights=context['author_weights'],
+        k=stop - start,
+    )
+    for pk, author_id in zip(range(start, stop), authors):
+        tag_ids = rng.sample(
+            context['tag_ids'], min(len(context['tag_ids']), rng.randint(1, 3))
+        )
+        recipes.append(Recipe(
+            id=pk,
+            author_id=author_id,
+            name=f'{rng.choice(ADJECTIVES)} {rng.choice(DISHES)} №{pk}',
+            text=' '.join(rng.choices(SENTENCES, k=rng.randint(2, 6))),
+            image=context['image'],
+            image_variants=context['image_variants'],
+            cooking_time=rng.randint(
+                MIN_COOKING_TIME, min(MAX_COOKING_TIME, 180)
+            ),
+            pub_date=START_DATE + timedelta(
+                seconds=rng.randrange(PERIOD_SECONDS)
+            ),
+            short_hash=encode(pk),
+            tags_mask=Recipe.get_tags_mask(tag_ids),
+        ))
+        recipe_tags.extend(
+            Recipe.tags.through(recipe_id=pk, tag_id=tag_id)
+            for tag_id in tag_ids
+        )
+        recipe_ingredients.extend(
+            RecipeIngredient(
+                recipe_id=pk, ingredient_id=ingredient_id,
+                amount=rng.randint(1, min(MAX_AMOUNT, 1000)),
+            )
+            for ingredient_id in weighted_sample(
+                rng, context['ingredient_ids'],
+                context['ingredient_weights'], rng.randint(3, 12),
+            )
+        )
+    write(Recipe, recipes)
+    write(Recipe.tags.through, recipe_tags, with_pk=False)
+    write(RecipeIngredient, recipe_ingredients, with_pk=False)
+
+
+def generate_relations(rng, start, stop):
+    context = _context
+    favorites, carts, follows = [], [], []
+    recipes = context['recipe_ids']
+    for user_id in range(start, stop):
+        favorites.extend(
+            Favorite(user_id=user_id, recipe_id=recipe_id)
+            for recipe_id in weighted_sample(
+                rng, recipes, context['recipe_weights'],
+                power_law_count(rng, context['favorites'], len(recipes)),
+            )
+        )
+        if rng.random() < context['cart_share']:
+            carts.extend(
+                ShoppingCart(user_id=user_id, recipe_id=recipe_id)
+                for recipe_id in weighted_sample(
+                    rng, recipes, context['recipe_weights'],
+                    rng.randint(1, 8),
+                )
+            )
+        follows.extend(
+            Follow(user_id=user_id, following_id=author_id)
+            for author_id in weighted_sample(
+                rng, context['user_ids'], context['author_weights'],
+                power_law_count(
+                    rng, context['follows'], len(context['user_ids'])
+                ),
+            )
+            if author_id != user_id
+        )
+    write(Favorite, favorites, with_pk=False)
+    write(ShoppingCart, carts, with_pk=False)
+    write(Follow, follows, with_pk=False)
+
+
+PHASES = {
+    'users': generate_users,
+    'recipes': generate_recipes,
+    'relations': generate_relations,
+}
+
+
+def run_chunk(task):
+    """Пачка [start, stop) фазы; свой генератор случайных чисел на пачку."""
+    phase, start, stop = task
+    rng = random.Random(f'{_context["seed"]}:{phase}:{start}')
+    with transaction.atomic():
+        PHASES[phase](rng, start, stop)
+    return stop - start
+
+
+def create_placeholder_image(seed, references):
+    """Одно изображение на все рецепты; ссылки учитываются в StoredFile."""
+    rng = random.Random(seed)
+    image = Image.new('RGB', (640, 480), tuple(
+        rng.randrange(256) for _ in range(3)
+    ))
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=80)
+    name = default_storage.save(
+        'recipes/images/generated.jpg', ContentFile(buffer.getvalue())
+    )
+    if isinstance(default_storage, ContentAddressedStorage) and references:
+        StoredFile.objects.filter(name=name).update(
+            references=F('references') + references - 1
+        )
+    variants = {'source': name}
+    variants.update(generate_variants(Recipe(image=name).image))
+    return name, variants
+
+
+def get_next_id(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def reset_sequences():
+    if connection.vendor != 'postgresql':
+        return
+    statements = connection.ops.sequence_reset_sql(no_style(), [
+        User, Recipe, Recipe.tags.through, RecipeIngredient, Favorite,
+        ShoppingCart, Follow,
+    ])
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def split(phase, start, stop, chunk_size):
+    return [
+        (phase, chunk, min(chunk + chunk_size, stop))
+        for chunk in range(start, stop, chunk_size)
+    ]
+
+
+def generate_data(users, recipes, seed=0, favorites=20, follows=10,
+                  cart_share=0.3, workers=1, chunk_size=10000,
+                  progress=None):
+    """
+    Создаёт users пользователей и recipes рецептов с ингредиентами,
+    тегами, избранным, корзинами и подписками. Данные зависят только от
+    seed и параметров, id выдаются явными диапазонами после текущих.
+    """
+    ingredient_ids = list(
+        Ingredient.objects.order_by('pk').values_list('pk', flat=True)
+    )
+    tag_ids = list(Tag.objects.order_by('pk').values_list('pk', flat=True))
+    if not ingredient_ids or not tag_ids:
+        raise ValueError('Нужны ингредиенты и теги: import_ingredients')
+    if connection.vendor != 'postgresql':
+        workers = 1
+    first_user, first_recipe = get_next_id(User), get_next_id(Recipe)
+    user_ids = list(range(first_user, first_user + users))
+    recipe_ids = list(range(first_recipe, first_recipe + recipes))
+    # Популярность не совпадает с порядком id.
+    popular_users, popular_recipes = user_ids[:], recipe_ids[:]
+    random.Random(seed).shuffle(popular_users)
+    random.Random(seed + 1).shuffle(popular_recipes)
+    image, image_variants = create_placeholder_image(seed, recipes)
+    _context.update(
+        seed=seed,
+        password=make_password(PASSWORD),
+        user_ids=popular_users,
+        author_weights=zipf_weights(users),
+        recipe_ids=popular_recipes,
+        recipe_weights=zipf_weights(recipes),
+        ingredient_ids=ingredient_ids,
+        ingredient_weights=zipf_weights(len(ingredient_ids)),
+        tag_ids=tag_ids,
+        image=image,
+        image_variants=image_variants,
+        favorites=favorites,
+        follows=follows,
+        cart_share=cart_share,
+    )
+    phases = (
+        split('users', first_user, first_user + users, chunk_size),
+        split('recipes', first_recipe, first_recipe + recipes, chunk_size),
+        split('relations', first_user, first_user + users, chunk_size),
+    )
+    pool = None
+    if workers > 1:
+        connections.close_all()
+        pool = multiprocessing.get_context('fork').Pool(workers)
+    try:
+        for tasks in phases:
+            results = (
+                pool.imap_unordered(run_chunk, tasks) if pool
+                else map(run_chunk, tasks)
+            )
+            for done in results:
+                if progress:
+                    progress(tasks[0][0], done)
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    reset_sequences()
+    return recipe_ids
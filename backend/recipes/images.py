@@ -0,0 +1,125 @@
+import logging
+import os
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from threading import Lock
+
+from django.apps import apps
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.dispatch import Signal
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .constants import (IMAGE_VARIANT_FORMATS, IMAGE_VARIANT_QUALITY,
+                        IMAGE_VARIANTS, IMAGE_VARIANTS_DIR, IMAGE_WORKERS)
+
+logger = logging.getLogger(__name__)
+
+# sender — модель, pk — объект, у которого готовы варианты изображения.
+variants_ready = Signal()
+
+
+def get_variants_field(field_name):
+    return f'{field_name}_variants'
+
+
+def _to_rgb(image):
+    if image.mode in ('RGB', 'L'):
+        return image
+    image = image.convert('RGBA')
+    background = Image.new('RGB', image.size, 'white')
+    background.paste(image, mask=image.getchannel('A'))
+    return background
+
+
+def generate_variants(file):
+    """
+    Уменьшенные копии изображения file во всех форматах:
+    {'thumb': {'webp': path, 'jpeg': path}, ...}.
+    """
+    name = file.name
+    base = posixpath.join(IMAGE_VARIANTS_DIR, posixpath.splitext(name)[0])
+    variants = {}
+    with file.storage.open(name) as source, Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA', 'L'):
+            image = image.convert('RGBA')
+        for variant, size in IMAGE_VARIANTS.items():
+            resized = image.copy()
+            resized.thumbnail(size, Image.LANCZOS)
+            for key, (image_format, extension) in (
+                IMAGE_VARIANT_FORMATS.items()
+            ):
+                buffer = BytesIO()
+                converted = resized if key == 'webp' else _to_rgb(resized)
+                converted.save(
+                    buffer, image_format,
+                    quality=IMAGE_VARIANT_QUALITY, optimize=True,
+                )
+                path = f'{base}/{variant}.{extension}'
+                if file.storage.exists(path):
+                    file.storage.delete(path)
+                variants.setdefault(variant, {})[key] = file.storage.save(
+                    path, ContentFile(buffer.getvalue())
+                )
+    return variants
+
+
+def process_image(model_label, pk, field_name, name):
+    """Строит варианты и сохраняет их, если изображение не сменилось."""
+    model = apps.get_model(model_label)
+    try:
+        instance = model.objects.only(field_name).get(
+            pk=pk, **{field_name: name}
+        )
+    except model.DoesNotExist:
+        return
+    variants = {'source': name}
+    try:
+        variants.update(generate_variants(getattr(instance, field_name)))
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError):
+        logger.exception('Не удалось обработать изображение %s', name)
+    updated = model.objects.filter(pk=pk, **{field_name: name}).update(
+        **{get_variants_field(field_name): variants}
+    )
+    if updated:
+        variants_ready.send(sender=model, pk=pk)
+
+
+class ImageProcessor:
+    """Пул потоков для обработки изображений, свой в каждом процессе."""
+
+    def __init__(self, workers):
+        self.workers = workers
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._lock = Lock()
+        self._executor = None
+
+    def _run(self, *args):
+        try:
+            process_image(*args)
+        except Exception:
+            logger.exception('Ошибка обработки изображения %s', args)
+        finally:
+            connection.close()
+
+    def submit(self, instance, field_name):
+        """Ставит изображение в очередь после коммита транзакции."""
+        args = (
+            instance._meta.label, instance.pk, field_name,
+            getattr(instance, field_name).name,
+        )
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    self.workers, thread_name_prefix='images'
+                )
+            executor = self._executor
+        transaction.on_commit(lambda: executor.submit(self._run, *args))
+
+
+image_processor = ImageProcessor(IMAGE_WORKERS)
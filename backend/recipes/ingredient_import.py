@@ -0,0 +1,209 @@
+import csv
+import io
+import json
+import os
+
+from django.db import connection, transaction
+
+from .cache import INGREDIENTS_GENERATION, bump_generation
+from .constants import (IMPORT_BATCH_SIZE, IMPORT_READ_SIZE,
+                        INGREDIENT_MAX_LENGTH, MEASUREMENT_UNIT_MAX_LENGTH)
+from .ingredient_index import normalize
+from .models import Ingredient
+
+FORMATS = ('csv', 'json')
+
+
+def get_key(name, measurement_unit):
+    return normalize(name), normalize(measurement_unit)
+
+
+def detect_format(path):
+    """Формат по расширению, иначе по первому значащему символу."""
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    if extension in FORMATS:
+        return extension
+    with open(path, encoding='utf-8-sig') as file:
+        for char in iter(lambda: file.read(1), ''):
+            if not char.isspace():
+                return 'json' if char in '[{' else 'csv'
+    return 'csv'
+
+
+def read_csv(file):
+    for number, row in enumerate(csv.reader(file), 1):
+        yield number, *(row + [None, None])[:2]
+
+
+def read_json(file):
+    """
+    Построчно разбирает JSON-массив объектов {name, measurement_unit},
+    не загружая файл целиком.
+    """
+    decoder = json.JSONDecoder()
+    buffer, position, number = '', 0, 0
+    while True:
+        chunk = file.read(IMPORT_READ_SIZE)
+        buffer = buffer[position:] + chunk
+        position = 0
+        while True:
+            while position < len(buffer) and (
+                buffer[position].isspace() or buffer[position] in '[,'
+            ):
+                position += 1
+            if position == len(buffer) or buffer[position] == ']':
+                break
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if not chunk:
+                    raise ValueError(
+                        f'Некорректный JSON после записи {number}'
+                    )
+                break
+            number += 1
+            if not isinstance(item, dict):
+                yield number, None, None
+                continue
+            yield number, item.get('name'), item.get('measurement_unit')
+        if not chunk or buffer[position:position + 1] == ']':
+            return
+
+
+def validate(name, measurement_unit):
+    if not isinstance(name, str) or not name.strip():
+        return 'пустое название ингредиента'
+    if not isinstance(measurement_unit, str) or not measurement_unit.strip():
+        return f'пустая единица измерения для "{name}"'
+    if len(name.strip()) > INGREDIENT_MAX_LENGTH:
+        return f'название длиннее {INGREDIENT_MAX_LENGTH} символов'
+    if len(measurement_unit.strip()) > MEASUREMENT_UNIT_MAX_LENGTH:
+        return (
+            'единица измерения длиннее '
+            f'{MEASUREMENT_UNIT_MAX_LENGTH} символов'
+        )
+    return None
+
+
+class BulkCreateWriter:
+    """
+    bulk_create с ignore_conflicts не сообщает, сколько строк вставлено,
+    поэтому созданные считаются по числу ингредиентов до и после.
+    """
+
+    def __init__(self):
+        self.initial = Ingredient.objects.count()
+
+    def write(self, rows):
+        Ingredient.objects.bulk_create(
+            [Ingredient(name=name, measurement_unit=unit)
+             for name, unit in rows],
+            ignore_conflicts=True,
+        )
+
+    def finish(self):
+        return Ingredient.objects.count() - self.initial
+
+
+class CopyWriter:
+    """COPY во временную таблицу и один INSERT ... ON CONFLICT."""
+
+    def __init__(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMPORARY TABLE ingredient_import '
+                '(name text, measurement_unit text) ON COMMIT DROP'
+            )
+
+    def write(self, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                'COPY ingredient_import (name, measurement_unit) '
+                'FROM STDIN WITH (FORMAT csv)',
+                buffer,
+            )
+
+    def finish(self):
+        table = connection.ops.quote_name(Ingredient._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} (name, measurement_unit) '
+                'SELECT name, measurement_unit FROM ingredient_import '
+                'ON CONFLICT (name, measurement_unit) DO NOTHING'
+            )
+            return cursor.rowcount
+
+
+class ImportReport:
+    def __init__(self):
+        self.processed = 0
+        self.created = 0
+        self.existing = 0
+        self.duplicates = 0
+        self.new = []
+        self.missing = []
+        self.errors = []
+
+
+def import_ingredients(path, file_format=None, dry_run=False,
+                       batch_size=IMPORT_BATCH_SIZE):
+    """
+    Импортирует ингредиенты из CSV или JSON. Дубликаты отсеиваются в
+    памяти по нормализованной паре (название, единица) против
+    загруженного одним запросом каталога; при dry_run база не меняется.
+    """
+    file_format = file_format or detect_format(path)
+    reader = read_json if file_format == 'json' else read_csv
+    existing = {
+        get_key(name, unit): (name, unit)
+        for name, unit in Ingredient.objects.values_list(
+            'name', 'measurement_unit'
+        ).iterator()
+    }
+    matched, seen = set(), set()
+    report = ImportReport()
+    with transaction.atomic(), open(path, encoding='utf-8-sig') as file:
+        writer = None
+        if not dry_run:
+            writer = (
+                CopyWriter() if connection.vendor == 'postgresql'
+                else BulkCreateWriter()
+            )
+        batch = []
+        for number, name, unit in reader(file):
+            report.processed += 1
+            error = validate(name, unit)
+            if error:
+                report.errors.append((number, error))
+                continue
+            name, unit = name.strip(), unit.strip()
+            key = get_key(name, unit)
+            if key in existing:
+                report.existing += 1
+                matched.add(key)
+                continue
+            if key in seen:
+                report.duplicates += 1
+                continue
+            seen.add(key)
+            report.new.append((name, unit))
+            if writer is None:
+                continue
+            batch.append((name, unit))
+            if len(batch) == batch_size:
+                writer.write(batch)
+                batch = []
+        if writer is not None:
+            if batch:
+                writer.write(batch)
+            report.created = writer.finish()
+            if report.created:
+                bump_generation(INGREDIENTS_GENERATION)
+    report.missing = [
+        ingredient for key, ingredient in existing.items()
+        if key not in matched
+    ]
+    return report
@@ -0,0 +1,65 @@
+from bisect import bisect_left
+from collections import namedtuple
+from threading import Lock
+
+from .cache import INGREDIENTS_GENERATION, get_generation
+from .models import Ingredient
+
+IndexEntry = namedtuple('IndexEntry', 'key id name measurement_unit')
+
+
+def normalize(name):
+    return name.strip().casefold().replace('ё', 'е')
+
+
+class IngredientIndex:
+    """
+    Префиксный индекс названий ингредиентов в памяти процесса.
+
+    Строится лениво и перестраивается при смене поколения ингредиентов.
+    Сначала возвращает совпадения по началу названия, затем по подстроке.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._generation = None
+        self._entries = []
+        self._keys = []
+
+    def _refresh(self):
+        generation = get_generation(INGREDIENTS_GENERATION)
+        if generation == self._generation:
+            return
+        with self._lock:
+            if generation == self._generation:
+                return
+            entries = sorted(
+                IndexEntry(normalize(name), pk, name, measurement_unit)
+                for pk, name, measurement_unit in Ingredient.objects
+                .values_list('id', 'name', 'measurement_unit')
+                .iterator()
+            )
+            self._entries = entries
+            self._keys = [entry.key for entry in entries]
+            self._generation = generation
+
+    def search(self, query=''):
+        self._refresh()
+        entries, keys = self._entries, self._keys
+        query = normalize(query)
+        if not query:
+            return list(entries)
+
+        prefix = []
+        for position in range(bisect_left(keys, query), len(keys)):
+            if not keys[position].startswith(query):
+                break
+            prefix.append(entries[position])
+        substring = [
+            entry for entry in entries
+            if query in entry.key and not entry.key.startswith(query)
+        ]
+        return prefix + substring
+
+
+ingredient_index = IngredientIndex()
@@ -0,0 +1,35 @@
+# Generated by Django 3.2.3 on 2026-10-17 04:12
+
+from django.db import migrations, models
+
+TAG_MASK_BITS = 63
+
+
+def fill_tags_mask(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    masks = {}
+    for recipe_id, tag_id in Recipe.tags.through.objects.values_list(
+        'recipe_id', 'tag_id'
+    ):
+        if tag_id < TAG_MASK_BITS:
+            masks[recipe_id] = masks.get(recipe_id, 0) | 1 << tag_id
+    recipes = Recipe.objects.filter(pk__in=masks).only('pk')
+    for recipe in recipes:
+        recipe.tags_mask = masks[recipe.pk]
+    Recipe.objects.bulk_update(recipes, ['tags_mask'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_alter_recipe_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='tags_mask',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False, verbose_name='Битовая маска тегов'),
+        ),
+        migrations.RunPython(fill_tags_mask, migrations.RunPython.noop),
+    ]
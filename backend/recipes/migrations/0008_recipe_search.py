@@ -0,0 +1,53 @@
+# Generated by Django 3.2.3 on 2026-10-17 04:15
+
+import django.contrib.postgres.search
+from django.db import migrations, models
+import django.db.models.deletion
+
+GIN_INDEX_NAME = 'recipes_recipe_search_vector_gin'
+
+
+def create_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE INDEX {GIN_INDEX_NAME} ON recipes_recipe '
+            'USING gin (search_vector)'
+        )
+
+
+def drop_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {GIN_INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_recipe_tags_mask'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='RecipeSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(db_index=True, max_length=64, verbose_name='Основа слова')),
+                ('weight', models.PositiveIntegerField(verbose_name='Вес')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='recipes.recipe')),
+            ],
+            options={
+                'verbose_name': 'Поисковый терм',
+                'verbose_name_plural': 'Поисковые термы',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='recipesearchterm',
+            constraint=models.UniqueConstraint(fields=('recipe', 'term'), name='unique_recipe_search_term'),
+        ),
+        migrations.RunPython(create_gin_index, drop_gin_index),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 3.2.3 on 2026-10-17 04:19
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Sum
+
+
+def fill_shopping_lists(apps, schema_editor):
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+    ShoppingListItem = apps.get_model('recipes', 'ShoppingListItem')
+    totals = RecipeIngredient.objects.filter(
+        recipe__shopping_cart__isnull=False
+    ).values_list(
+        'recipe__shopping_cart__user_id', 'ingredient_id'
+    ).annotate(total=Sum('amount'))
+    ShoppingListItem.objects.bulk_create(
+        [
+            ShoppingListItem(
+                user_id=user_id, ingredient_id=ingredient_id,
+                total_amount=total,
+            )
+            for user_id, ingredient_id, total in totals
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0008_recipe_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShoppingListItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_amount', models.PositiveIntegerField(verbose_name='Общее количество')),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopping_list_items', to='recipes.ingredient', verbose_name='Ингредиент')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopping_list_items', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Позиция списка покупок',
+                'verbose_name_plural': 'Позиции списков покупок',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='shoppinglistitem',
+            constraint=models.UniqueConstraint(fields=('user', 'ingredient'), name='unique_shopping_list_item'),
+        ),
+        migrations.RunPython(fill_shopping_lists, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 3.2.3 on 2026-10-17 04:21
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def _count(queryset, field):
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef('pk')}).order_by()
+        .values(field).annotate(total=Count('pk')).values('total')
+    ), Value(0))
+
+
+def fill_counters(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Tag = apps.get_model('recipes', 'Tag')
+    Favorite = apps.get_model('recipes', 'Favorite')
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+    User = apps.get_model('users', 'FoodgramUser')
+    Follow = apps.get_model('users', 'Follow')
+    Recipe.objects.update(
+        favorites_count=_count(Favorite.objects.all(), 'recipe'),
+        ingredients_count=_count(RecipeIngredient.objects.all(), 'recipe'),
+    )
+    Tag.objects.update(
+        recipes_count=_count(Recipe.tags.through.objects.all(), 'tag')
+    )
+    User.objects.update(
+        recipes_count=_count(Recipe.objects.all(), 'author'),
+        followers_count=_count(Follow.objects.all(), 'following'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_shopping_list_item'),
+        ('users', '0005_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='В избранном'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='ingredients_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Кол-во ингредиентов'),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='recipes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Кол-во рецептов'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,111 @@
+# Generated by Django 3.2.3 on 2026-10-17 04:23
+
+import hashlib
+import string
+
+from django.conf import settings
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+# Копия recipes.short_links.encode на момент миграции: дальнейшие
+# изменения кодировщика не должны менять её результат.
+ALPHABET = string.digits + string.ascii_letters
+LENGTH = 7
+ROUNDS = 3
+KEYSPACE = len(ALPHABET) ** LENGTH
+
+
+def _round_keys():
+    keys = []
+    for number in range(ROUNDS):
+        digest = hashlib.sha256(
+            f'{settings.SHORT_LINK_KEY}:{number}'.encode()
+        ).digest()
+        multiplier = int.from_bytes(digest[:16], 'big') % KEYSPACE | 1
+        while multiplier % 31 == 0:
+            multiplier += 2
+        keys.append(
+            (multiplier, int.from_bytes(digest[16:], 'big') % KEYSPACE)
+        )
+    return keys
+
+
+def _to_digits(value):
+    digits = []
+    for _ in range(LENGTH):
+        value, digit = divmod(value, len(ALPHABET))
+        digits.append(digit)
+    return digits
+
+
+def _rotate(value):
+    digits = _to_digits(value)
+    digits = digits[1:] + digits[:1]
+    value = 0
+    for digit in reversed(digits):
+        value = value * len(ALPHABET) + digit
+    return value
+
+
+def encode(pk, keys):
+    value = pk
+    for multiplier, shift in keys:
+        value = _rotate((value * multiplier + shift) % KEYSPACE)
+    return ''.join(ALPHABET[digit] for digit in reversed(_to_digits(value)))
+
+
+def _rewrite(Recipe, get_short_hash):
+    recipes = Recipe.objects.only('id', 'short_hash', 'legacy_short_hash')
+    batch = []
+    for recipe in recipes.iterator(chunk_size=BATCH_SIZE):
+        recipe.short_hash, recipe.legacy_short_hash = get_short_hash(recipe)
+        batch.append(recipe)
+        if len(batch) == BATCH_SIZE:
+            Recipe.objects.bulk_update(
+                batch, ['short_hash', 'legacy_short_hash']
+            )
+            batch = []
+    Recipe.objects.bulk_update(batch, ['short_hash', 'legacy_short_hash'])
+
+
+def encode_short_hashes(apps, schema_editor):
+    """
+    Выданные ранее случайные коды сохраняются в legacy_short_hash.
+    Новые коды длиннее старых и не пересекаются с ними.
+    """
+    keys = _round_keys()
+
+    def get_short_hash(recipe):
+        short_hash = encode(recipe.id, keys)
+        if recipe.short_hash in ('', short_hash):
+            return short_hash, None
+        return short_hash, recipe.short_hash
+
+    _rewrite(apps.get_model('recipes', 'Recipe'), get_short_hash)
+
+
+def restore_short_hashes(apps, schema_editor):
+    keys = _round_keys()
+    _rewrite(
+        apps.get_model('recipes', 'Recipe'),
+        lambda recipe: (
+            recipe.legacy_short_hash or encode(recipe.id, keys), None
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='legacy_short_hash',
+            field=models.CharField(editable=False, max_length=10, null=True, unique=True, verbose_name='Старый код короткой ссылки'),
+        ),
+        migrations.RunPython(encode_short_hashes, restore_short_hashes),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.3 on 2026-10-17 04:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_recipe_legacy_short_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='short_link_visits',
+            field=models.PositiveBigIntegerField(default=0, editable=False, verbose_name='Переходы по короткой ссылке'),
+        ),
+    ]
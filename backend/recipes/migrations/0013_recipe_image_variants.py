@@ -0,0 +1,18 @@
+# Generated by Django 3.2.3 on 2026-10-17 04:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_recipe_short_link_visits'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_variants',
+            field=models.JSONField(default=dict, editable=False, verbose_name='Варианты изображения'),
+        ),
+    ]
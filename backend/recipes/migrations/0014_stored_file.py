@@ -0,0 +1,26 @@
+# Generated by Django 3.2.3 on 2026-10-17 04:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0013_recipe_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Путь')),
+                ('size', models.PositiveBigIntegerField(verbose_name='Размер')),
+                ('references', models.PositiveIntegerField(default=0, verbose_name='Кол-во ссылок')),
+            ],
+            options={
+                'verbose_name': 'Файл',
+                'verbose_name_plural': 'Файлы',
+            },
+        ),
+    ]
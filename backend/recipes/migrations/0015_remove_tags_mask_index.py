@@ -0,0 +1,18 @@
+# Generated by Django 3.2.3 on 2026-10-17 04:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0014_stored_file'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='tags_mask',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='Битовая маска тегов'),
+        ),
+    ]
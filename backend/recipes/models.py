@@ -1,17 +1,18 @@
-import random
-import string
-
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db.models import (CASCADE, CharField, DateTimeField, ForeignKey,
-                              ImageField, ManyToManyField, Model,
-                              PositiveSmallIntegerField, SlugField, TextField,
-                              UniqueConstraint)
+from django.db import connection
+from django.db.models import (CASCADE, BigIntegerField, CharField,
+                              DateTimeField, ForeignKey, ImageField, JSONField,
+                              ManyToManyField, Model, PositiveBigIntegerField,
+                              PositiveIntegerField, PositiveSmallIntegerField,
+                              SlugField, TextField, UniqueConstraint)
 
 from users.models import User
 from .constants import (INGREDIENT_MAX_LENGTH, MAX_AMOUNT, MAX_COOKING_TIME,
                         MAX_RECIPE_NAME_LENGTH, MEASUREMENT_UNIT_MAX_LENGTH,
-                        MIN_AMOUNT, MIN_COOKING_TIME, SHORT_ID_DEFAULT_LENGTH,
-                        TAG_MAX_LENGTH)
+                        MIN_AMOUNT, MIN_COOKING_TIME, SEARCH_TERM_MAX_LENGTH,
+                        TAG_MASK_BITS, TAG_MAX_LENGTH)
+from .short_links import encode
 
 
 class Tag(Model):
@@ -25,6 +26,11 @@ class Tag(Model):
         max_length=TAG_MAX_LENGTH,
         unique=True
     )
+    recipes_count = PositiveIntegerField(
+        'Кол-во рецептов',
+        default=0,
+        editable=False
+    )
 
     class Meta:
         verbose_name = 'Тег'
@@ -73,6 +79,11 @@ class Recipe(Model):
         'Изображение рецепта',
         upload_to='recipes/images/'
     )
+    image_variants = JSONField(
+        'Варианты изображения',
+        default=dict,
+        editable=False
+    )
     text = TextField(
         'Описание рецепта'
     )
@@ -86,6 +97,11 @@ class Recipe(Model):
         related_name='recipes',
         verbose_name='Теги'
     )
+    tags_mask = BigIntegerField(
+        'Битовая маска тегов',
+        default=0,
+        editable=False
+    )
     cooking_time = PositiveSmallIntegerField(
         'Время приготовления (минуты)',
         validators=(MinValueValidator(MIN_COOKING_TIME,
@@ -105,6 +121,32 @@ class Recipe(Model):
         blank=True,
         null=True
     )
+    legacy_short_hash = CharField(
+        'Старый код короткой ссылки',
+        max_length=10,
+        unique=True,
+        null=True,
+        editable=False
+    )
+    short_link_visits = PositiveBigIntegerField(
+        'Переходы по короткой ссылке',
+        default=0,
+        editable=False
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False
+    )
+    favorites_count = PositiveIntegerField(
+        'В избранном',
+        default=0,
+        editable=False
+    )
+    ingredients_count = PositiveIntegerField(
+        'Кол-во ингредиентов',
+        default=0,
+        editable=False
+    )
 
     class Meta:
         verbose_name = 'Рецепт'
@@ -112,13 +154,40 @@ class Recipe(Model):
         ordering = ('-pub_date',)
 
     @staticmethod
-    def generate_short_hash():
-        chars = string.ascii_letters + string.digits
-        while True:
-            short_hash = ''.join(random.choices(
-                chars, k=SHORT_ID_DEFAULT_LENGTH))
-            if not Recipe.objects.filter(short_hash=short_hash).first():
-                return short_hash
+    def get_tags_mask(tag_ids):
+        """Маска тегов: бит с номером id тега, для id < TAG_MASK_BITS."""
+        mask = 0
+        for tag_id in tag_ids:
+            if tag_id < TAG_MASK_BITS:
+                mask |= 1 << tag_id
+        return mask
+
+    @classmethod
+    def latest_by_author(cls, author_ids, limit=None):
+        """
+        Последние limit рецептов каждого автора одним запросом
+        (ROW_NUMBER() OVER PARTITION BY author): {author_id: [recipe, ...]}.
+        """
+        author_ids = list(author_ids)
+        result = {author_id: [] for author_id in author_ids}
+        if not author_ids:
+            return result
+        if limit is None:
+            recipes = cls.objects.filter(author_id__in=author_ids)
+        else:
+            table = connection.ops.quote_name(cls._meta.db_table)
+            placeholders = ', '.join(['%s'] * len(author_ids))
+            recipes = cls.objects.raw(
+                f'SELECT * FROM (SELECT {table}.*, ROW_NUMBER() OVER ('
+                f'PARTITION BY author_id ORDER BY pub_date DESC, id DESC'
+                f') AS position FROM {table} '
+                f'WHERE author_id IN ({placeholders})) ranked '
+                f'WHERE position <= %s ORDER BY author_id, position',
+                [*author_ids, limit],
+            )
+        for recipe in recipes:
+            result[recipe.author_id].append(recipe)
+        return result
 
     def get_short_link(self, request=None):
         if request is not None:
@@ -126,9 +195,12 @@ class Recipe(Model):
             return f'{domain}/s/{self.short_hash}'
 
     def save(self, *args, **kwargs):
-        if not self.short_hash:
-            self.short_hash = self.generate_short_hash()
         super().save(*args, **kwargs)
+        if not self.short_hash:
+            self.short_hash = encode(self.pk)
+            Recipe.objects.filter(pk=self.pk).update(
+                short_hash=self.short_hash
+            )
 
     def __str__(self):
         return self.name
@@ -170,6 +242,35 @@ class RecipeIngredient(Model):
                 f'{self.ingredient.measurement_unit}')
 
 
+class RecipeSearchTerm(Model):
+    """Инвертированный индекс поиска для баз без tsvector (SQLite)."""
+
+    recipe = ForeignKey(
+        Recipe,
+        on_delete=CASCADE,
+        related_name='search_terms'
+    )
+    term = CharField(
+        'Основа слова',
+        max_length=SEARCH_TERM_MAX_LENGTH,
+        db_index=True
+    )
+    weight = PositiveIntegerField('Вес')
+
+    class Meta:
+        verbose_name = 'Поисковый терм'
+        verbose_name_plural = 'Поисковые термы'
+        constraints = [
+            UniqueConstraint(
+                fields=['recipe', 'term'],
+                name='unique_recipe_search_term'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.term} ({self.weight})'
+
+
 class Favorite(Model):
     user = ForeignKey(
         User,
@@ -224,3 +325,49 @@ class ShoppingCart(Model):
 
     def __str__(self):
         return f'{self.user} добавил в список покупок {self.recipe}'
+
+
+class ShoppingListItem(Model):
+    """Суммарное количество ингредиента в списке покупок пользователя."""
+
+    user = ForeignKey(
+        User,
+        on_delete=CASCADE,
+        related_name='shopping_list_items',
+        verbose_name='Пользователь'
+    )
+    ingredient = ForeignKey(
+        Ingredient,
+        on_delete=CASCADE,
+        related_name='shopping_list_items',
+        verbose_name='Ингредиент'
+    )
+    total_amount = PositiveIntegerField('Общее количество')
+
+    class Meta:
+        verbose_name = 'Позиция списка покупок'
+        verbose_name_plural = 'Позиции списков покупок'
+        constraints = [
+            UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_shopping_list_item'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.user}: {self.ingredient} — {self.total_amount}'
+
+
+class StoredFile(Model):
+    """Файл в хранилище по хешу содержимого и число ссылок на него."""
+
+    name = CharField('Путь', max_length=255, unique=True)
+    size = PositiveBigIntegerField('Размер')
+    references = PositiveIntegerField('Кол-во ссылок', default=0)
+
+    class Meta:
+        verbose_name = 'Файл'
+        verbose_name_plural = 'Файлы'
+
+    def __str__(self):
+        return self.name
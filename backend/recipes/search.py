@@ -0,0 +1,155 @@
+import re
+
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connection
+from django.db.models import Count, F, OuterRef, Subquery, Sum, Value
+
+from .constants import SEARCH_TERM_MAX_LENGTH
+from .models import Ingredient, Recipe, RecipeSearchTerm
+from .utils import on_commit_batch
+
+SEARCH_CONFIG = 'russian'
+NAME_WEIGHT = 4
+INGREDIENT_WEIGHT = 2
+TEXT_WEIGHT = 1
+
+WORD = re.compile(r'[0-9a-zа-я]+')
+RV = re.compile(r'^(.*?[аеиоуыэюя])(.*)$')
+PERFECTIVE_GERUND = re.compile(
+    r'(?:(?<=[ая])(?:в|вши|вшись)|(?:ив|ивши|ившись|ыв|ывши|ывшись))$'
+)
+REFLEXIVE = re.compile(r'с[яь]$')
+ADJECTIVE = re.compile(
+    r'(?:ее|ие|ые|ое|ими|ыми|ей|ий|ый|ой|ем|им|ым|ом|его|ого|ему|ому|их|ых'
+    r'|ую|юю|ая|яя|ою|ею)$'
+)
+PARTICIPLE = re.compile(r'(?:(?<=[ая])(?:ем|нн|вш|ющ|щ)|(?:ивш|ывш|ующ))$')
+VERB = re.compile(
+    r'(?:(?<=[ая])(?:ла|на|ете|йте|ли|й|л|ем|н|ло|но|ет|ют|ны|ть|ешь|нно)'
+    r'|(?:ила|ыла|ена|ейте|уйте|ите|или|ыли|ей|уй|ил|ыл|им|ым|ен|ило|ыло'
+    r'|ено|ят|ует|уют|ит|ыт|ены|ить|ыть|ишь|ую|ю))$'
+)
+NOUN = re.compile(
+    r'(?:а|ев|ов|ие|ье|е|иями|ями|ами|еи|ии|и|ией|ей|ой|ий|й|иям|ям|ием|ем'
+    r'|ам|ом|о|у|ах|иях|ях|ы|ь|ию|ью|ю|ия|ья|я)$'
+)
+DERIVATIONAL = re.compile(r'.*[^аеиоуыэюя]+[аеиоуыэюя].*ость?$')
+DERIVATIONAL_SUFFIX = re.compile(r'ость?$')
+SUPERLATIVE = re.compile(r'ейше?$')
+STOP_WORDS = frozenset((
+    'и', 'в', 'во', 'на', 'с', 'со', 'к', 'ко', 'по', 'за', 'из', 'от', 'до',
+    'для', 'не', 'а', 'но', 'или', 'же', 'бы', 'ли', 'что', 'как', 'то',
+))
+
+
+def stem(word):
+    """Русский стеммер Портера (Snowball) для одного слова."""
+    match = RV.match(word)
+    if not match:
+        return word
+    prefix, rv = match.groups()
+
+    stripped = PERFECTIVE_GERUND.sub('', rv, 1)
+    if stripped == rv:
+        rv = REFLEXIVE.sub('', rv, 1)
+        stripped = ADJECTIVE.sub('', rv, 1)
+        if stripped != rv:
+            rv = PARTICIPLE.sub('', stripped, 1)
+        else:
+            stripped = VERB.sub('', rv, 1)
+            rv = NOUN.sub('', rv, 1) if stripped == rv else stripped
+    else:
+        rv = stripped
+
+    if rv.endswith('и'):
+        rv = rv[:-1]
+    if DERIVATIONAL.match(rv):
+        rv = DERIVATIONAL_SUFFIX.sub('', rv, 1)
+    if rv.endswith('ь'):
+        rv = rv[:-1]
+    else:
+        rv = SUPERLATIVE.sub('', rv, 1)
+        if rv.endswith('нн'):
+            rv = rv[:-1]
+    return prefix + rv
+
+
+def tokenize(text):
+    return [
+        stem(word)[:SEARCH_TERM_MAX_LENGTH]
+        for word in WORD.findall(text.casefold().replace('ё', 'е'))
+        if word not in STOP_WORDS
+    ]
+
+
+def uses_postgres():
+    return connection.vendor == 'postgresql'
+
+
+def index_recipes(recipe_ids):
+    """Пересчитывает поисковый индекс для указанных рецептов."""
+    ingredients = {}
+    for recipe_id, name in Ingredient.objects.filter(
+        ingredient_recipes__recipe_id__in=recipe_ids
+    ).values_list('ingredient_recipes__recipe_id', 'name'):
+        ingredients.setdefault(recipe_id, []).append(name)
+
+    if uses_postgres():
+        for recipe_id in recipe_ids:
+            Recipe.objects.filter(pk=recipe_id).update(search_vector=(
+                SearchVector('name', weight='A', config=SEARCH_CONFIG)
+                + SearchVector(
+                    Value(' '.join(ingredients.get(recipe_id, []))),
+                    weight='B', config=SEARCH_CONFIG,
+                )
+                + SearchVector('text', weight='C', config=SEARCH_CONFIG)
+            ))
+        return
+
+    terms = []
+    for recipe_id, name, text in Recipe.objects.filter(
+        pk__in=recipe_ids
+    ).values_list('id', 'name', 'text'):
+        weights = {}
+        for source, weight in (
+            (name, NAME_WEIGHT),
+            (' '.join(ingredients.get(recipe_id, [])), INGREDIENT_WEIGHT),
+            (text, TEXT_WEIGHT),
+        ):
+            for term in tokenize(source):
+                weights[term] = weights.get(term, 0) + weight
+        terms.extend(
+            RecipeSearchTerm(recipe_id=recipe_id, term=term, weight=weight)
+            for term, weight in weights.items()
+        )
+    RecipeSearchTerm.objects.filter(recipe_id__in=recipe_ids).delete()
+    RecipeSearchTerm.objects.bulk_create(terms, batch_size=1000)
+
+
+def schedule_index(*recipe_ids):
+    """Откладывает переиндексацию рецептов до коммита транзакции."""
+    on_commit_batch(index_recipes, recipe_ids)
+
+
+def search_recipes(queryset, query):
+    """Фильтрует queryset по запросу и сортирует по релевантности."""
+    if uses_postgres():
+        search_query = SearchQuery(query, config=SEARCH_CONFIG)
+        return queryset.filter(search_vector=search_query).annotate(
+            search_rank=SearchRank(F('search_vector'), search_query)
+        ).order_by('-search_rank', '-pub_date')
+
+    terms = set(tokenize(query))
+    if not terms:
+        return queryset.none()
+    matches = RecipeSearchTerm.objects.filter(term__in=terms).values(
+        'recipe'
+    ).annotate(
+        matched=Count('id'), score=Sum('weight')
+    ).filter(matched=len(terms))
+    return queryset.filter(pk__in=matches.values('recipe')).annotate(
+        search_rank=Subquery(
+            matches.filter(recipe=OuterRef('pk')).values('score')
+        )
+    ).order_by('-search_rank', '-pub_date')
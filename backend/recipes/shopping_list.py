@@ -0,0 +1,105 @@
+from django.db import transaction
+from django.db.models import Sum
+
+from users.models import User
+from .models import RecipeIngredient, ShoppingCart, ShoppingListItem
+
+
+def get_recipe_amounts(recipe_id):
+    return dict(RecipeIngredient.objects.filter(recipe_id=recipe_id)
+                .values_list('ingredient_id', 'amount'))
+
+
+@transaction.atomic
+def apply_delta(user_ids, delta):
+    """
+    Прибавляет delta {ingredient_id: amount} к спискам покупок
+    пользователей user_ids. Позиции с нулевым итогом удаляются.
+    Строки пользователей блокируются по возрастанию pk: они есть всегда,
+    в отличие от ещё не созданных позиций, и порядок исключает
+    взаимоблокировки между правкой рецепта и корзинами.
+    """
+    delta = {pk: amount for pk, amount in delta.items() if amount}
+    user_ids = list(user_ids)
+    if not delta or not user_ids:
+        return
+    user_ids = list(
+        User.objects.select_for_update().filter(pk__in=user_ids)
+        .order_by('pk').values_list('pk', flat=True)
+    )
+    existing = {
+        (item.user_id, item.ingredient_id): item
+        for item in ShoppingListItem.objects.filter(
+            user_id__in=user_ids, ingredient_id__in=delta
+        )
+    }
+    to_create, to_update, to_delete = [], [], []
+    for user_id in user_ids:
+        for ingredient_id, amount in delta.items():
+            item = existing.get((user_id, ingredient_id))
+            if item is None:
+                if amount > 0:
+                    to_create.append(ShoppingListItem(
+                        user_id=user_id,
+                        ingredient_id=ingredient_id,
+                        total_amount=amount,
+                    ))
+                continue
+            item.total_amount += amount
+            if item.total_amount > 0:
+                to_update.append(item)
+            else:
+                to_delete.append(item.pk)
+    ShoppingListItem.objects.bulk_create(to_create)
+    ShoppingListItem.objects.bulk_update(to_update, ['total_amount'])
+    ShoppingListItem.objects.filter(pk__in=to_delete).delete()
+
+
+def add_recipe(user_id, recipe_id, sign=1):
+    apply_delta([user_id], {
+        ingredient_id: sign * amount
+        for ingredient_id, amount in get_recipe_amounts(recipe_id).items()
+    })
+
+
+def remove_recipe(user_id, recipe_id):
+    add_recipe(user_id, recipe_id, sign=-1)
+
+
+def apply_recipe_change(recipe_id, delta):
+    """Переносит изменение ингредиентов рецепта в списки покупок."""
+    apply_delta(
+        ShoppingCart.objects.filter(recipe_id=recipe_id)
+        .values_list('user_id', flat=True),
+        delta,
+    )
+
+
+@transaction.atomic
+def rebuild(user_ids=None):
+    """Пересобирает списки покупок из корзин и ингредиентов рецептов."""
+    carts = ShoppingCart.objects.all()
+    items = ShoppingListItem.objects.all()
+    if user_ids is not None:
+        carts = carts.filter(user_id__in=user_ids)
+        items = items.filter(user_id__in=user_ids)
+    totals = {
+        (user_id, ingredient_id): amount
+        for user_id, ingredient_id, amount in RecipeIngredient.objects.filter(
+            recipe__shopping_cart__in=carts
+        ).values_list(
+            'recipe__shopping_cart__user_id', 'ingredient_id'
+        ).annotate(total=Sum('amount')).iterator()
+    }
+    items.delete()
+    ShoppingListItem.objects.bulk_create(
+        (
+            ShoppingListItem(
+                user_id=user_id, ingredient_id=ingredient_id,
+                total_amount=amount,
+            )
+            for (user_id, ingredient_id), amount in totals.items()
+        ),
+        batch_size=1000,
+    )
+    return len(totals)
@@ -0,0 +1,77 @@
+import hashlib
+import string
+
+from django.conf import settings
+
+from .constants import SHORT_LINK_LENGTH, SHORT_LINK_ROUNDS
+
+ALPHABET = string.digits + string.ascii_letters
+BASE = len(ALPHABET)
+KEYSPACE = BASE ** SHORT_LINK_LENGTH
+_POSITIONS = {char: position for position, char in enumerate(ALPHABET)}
+_round_keys = {}
+
+
+def get_round_keys():
+    """
+    Ключи раундов (множитель, сдвиг) из SHORT_LINK_KEY. Множитель
+    взаимно прост с KEYSPACE = 2**n * 31**n, поэтому каждый раунд
+    x -> a * x + b (mod KEYSPACE) обратим.
+    """
+    key = settings.SHORT_LINK_KEY
+    if key not in _round_keys:
+        keys = []
+        for number in range(SHORT_LINK_ROUNDS):
+            digest = hashlib.sha256(f'{key}:{number}'.encode()).digest()
+            multiplier = int.from_bytes(digest[:16], 'big') % KEYSPACE | 1
+            while multiplier % 31 == 0:
+                multiplier += 2
+            shift = int.from_bytes(digest[16:], 'big') % KEYSPACE
+            keys.append((multiplier, shift, pow(multiplier, -1, KEYSPACE)))
+        _round_keys[key] = keys
+    return _round_keys[key]
+
+
+def _to_digits(value):
+    digits = []
+    for _ in range(SHORT_LINK_LENGTH):
+        value, digit = divmod(value, BASE)
+        digits.append(digit)
+    return digits
+
+
+def _from_digits(digits):
+    value = 0
+    for digit in reversed(digits):
+        value = value * BASE + digit
+    return value
+
+
+def _rotate(value, step):
+    digits = _to_digits(value)
+    step %= SHORT_LINK_LENGTH
+    return _from_digits(digits[step:] + digits[:step])
+
+
+def encode(pk):
+    """Короткий код рецепта: биективная перестановка id в base62."""
+    if not 0 < pk < KEYSPACE:
+        raise ValueError(f'id {pk} вне пространства коротких ссылок')
+    value = pk
+    for multiplier, shift, _ in get_round_keys():
+        value = _rotate((value * multiplier + shift) % KEYSPACE, 1)
+    return ''.join(ALPHABET[digit] for digit in reversed(_to_digits(value)))
+
+
+def decode(short_hash):
+    """id рецепта по короткому коду или None, если код не из encode()."""
+    if len(short_hash) != SHORT_LINK_LENGTH:
+        return None
+    try:
+        digits = [_POSITIONS[char] for char in reversed(short_hash)]
+    except KeyError:
+        return None
+    value = _from_digits(digits)
+    for _, shift, inverse in reversed(get_round_keys()):
+        value = (_rotate(value, -1) - shift) * inverse % KEYSPACE
+    return value or None
@@ -0,0 +1,241 @@
+from django.db.models import F
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+
+from users.models import User
+from . import shopping_list
+from .counters import change_counter
+from .coverage_index import schedule_coverage_update
+from .images import get_variants_field, image_processor
+from .models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                     ShoppingCart, Tag)
+from .search import schedule_index
+from .storage import ContentAddressedStorage
+
+RECIPE_SEARCH_FIELDS = frozenset(('name', 'text'))
+IMAGE_FIELDS = {Recipe: 'image', User: 'avatar'}
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def update_tags_mask(instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        instance.tags_mask = Recipe.get_tags_mask(
+            instance.tags.values_list('id', flat=True)
+        )
+        Recipe.objects.filter(pk=instance.pk).update(
+            tags_mask=instance.tags_mask
+        )
+        return
+    bit = Recipe.get_tags_mask([instance.pk])
+    if not bit:
+        return
+    recipes = Recipe.objects.all()
+    if action == 'post_add':
+        recipes.filter(pk__in=pk_set).update(
+            tags_mask=F('tags_mask').bitor(bit)
+        )
+        return
+    if pk_set is not None:
+        recipes = recipes.filter(pk__in=pk_set)
+    recipes.update(tags_mask=F('tags_mask').bitand(~bit))
+
+
+@receiver(post_delete, sender=Tag)
+def clear_deleted_tag_bit(instance, **kwargs):
+    bit = Recipe.get_tags_mask([instance.pk])
+    if bit:
+        Recipe.objects.update(tags_mask=F('tags_mask').bitand(~bit))
+
+
+@receiver(post_save, sender=Recipe)
+def index_recipe(instance, update_fields=None, **kwargs):
+    if update_fields and not RECIPE_SEARCH_FIELDS.intersection(update_fields):
+        return
+    schedule_index(instance.pk)
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def index_recipe_ingredients(instance, **kwargs):
+    schedule_index(instance.recipe_id)
+    schedule_coverage_update(instance.recipe_id)
+
+
+@receiver(post_save, sender=Ingredient)
+def index_ingredient_recipes(instance, created, **kwargs):
+    if created:
+        return
+    schedule_index(*instance.ingredient_recipes.values_list(
+        'recipe_id', flat=True
+    ))
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_to_shopping_list(instance, created, **kwargs):
+    if created:
+        shopping_list.add_recipe(instance.user_id, instance.recipe_id)
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def remove_from_shopping_list(instance, **kwargs):
+    shopping_list.remove_recipe(instance.user_id, instance.recipe_id)
+
+
+@receiver(pre_save, sender=RecipeIngredient)
+def remember_recipe_ingredient(instance, **kwargs):
+    instance._previous = instance.pk and RecipeIngredient.objects.filter(
+        pk=instance.pk
+    ).values_list('ingredient_id', 'amount').first()
+
+
+@receiver(post_save, sender=RecipeIngredient)
+def update_shopping_lists(instance, **kwargs):
+    delta = {instance.ingredient_id: instance.amount}
+    if instance._previous:
+        ingredient_id, amount = instance._previous
+        delta[ingredient_id] = delta.get(ingredient_id, 0) - amount
+    shopping_list.apply_recipe_change(instance.recipe_id, delta)
+
+
+@receiver(post_delete, sender=RecipeIngredient)
+def subtract_from_shopping_lists(instance, **kwargs):
+    shopping_list.apply_recipe_change(
+        instance.recipe_id, {instance.ingredient_id: -instance.amount}
+    )
+
+
+@receiver(post_save, sender=Favorite)
+def increment_favorites_count(instance, created, **kwargs):
+    if created:
+        change_counter(
+            Recipe.objects.filter(pk=instance.recipe_id), 'favorites_count', 1
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+def decrement_favorites_count(instance, **kwargs):
+    change_counter(
+        Recipe.objects.filter(pk=instance.recipe_id), 'favorites_count', -1
+    )
+
+
+@receiver(post_save, sender=RecipeIngredient)
+def increment_ingredients_count(instance, created, **kwargs):
+    if created:
+        change_counter(
+            Recipe.objects.filter(pk=instance.recipe_id),
+            'ingredients_count', 1
+        )
+
+
+@receiver(post_delete, sender=RecipeIngredient)
+def decrement_ingredients_count(instance, **kwargs):
+    change_counter(
+        Recipe.objects.filter(pk=instance.recipe_id), 'ingredients_count', -1
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def increment_recipes_count(instance, created, **kwargs):
+    if created:
+        change_counter(
+            User.objects.filter(pk=instance.author_id), 'recipes_count', 1
+        )
+
+
+@receiver(pre_delete, sender=Recipe)
+def decrement_recipe_counters(instance, **kwargs):
+    change_counter(
+        User.objects.filter(pk=instance.author_id), 'recipes_count', -1
+    )
+    change_counter(
+        Tag.objects.filter(recipes=instance), 'recipes_count', -1
+    )
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def update_tag_recipes_count(instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        instance._cleared_tag_ids = (
+            None if reverse
+            else list(instance.tags.values_list('id', flat=True))
+        )
+        return
+    if action == 'post_clear':
+        if reverse:
+            Tag.objects.filter(pk=instance.pk).update(recipes_count=0)
+        else:
+            change_counter(
+                Tag.objects.filter(pk__in=instance._cleared_tag_ids),
+                'recipes_count', -1
+            )
+        return
+    if action not in ('post_add', 'post_remove') or not pk_set:
+        return
+    delta = 1 if action == 'post_add' else -1
+    if reverse:
+        change_counter(
+            Tag.objects.filter(pk=instance.pk),
+            'recipes_count', delta * len(pk_set)
+        )
+    else:
+        change_counter(
+            Tag.objects.filter(pk__in=pk_set), 'recipes_count', delta
+        )
+
+
+@receiver(pre_save, sender=Recipe)
+@receiver(pre_save, sender=User)
+def reset_image_variants(sender, instance, **kwargs):
+    field_name = IMAGE_FIELDS[sender]
+    variants_field = get_variants_field(field_name)
+    image = getattr(instance, field_name)
+    if getattr(instance, variants_field).get('source') != image.name:
+        setattr(instance, variants_field, {})
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=User)
+def schedule_image_variants(sender, instance, **kwargs):
+    field_name = IMAGE_FIELDS[sender]
+    if getattr(instance, field_name) and not getattr(
+        instance, get_variants_field(field_name)
+    ):
+        image_processor.submit(instance, field_name)
+
+
+def release_image(sender, name):
+    storage = sender._meta.get_field(IMAGE_FIELDS[sender]).storage
+    if name and isinstance(storage, ContentAddressedStorage):
+        storage.release(name)
+
+
+@receiver(pre_save, sender=Recipe)
+@receiver(pre_save, sender=User)
+def remember_replaced_image(sender, instance, update_fields=None, **kwargs):
+    field_name = IMAGE_FIELDS[sender]
+    if instance._state.adding or (
+        update_fields and field_name not in update_fields
+    ):
+        return
+    image = getattr(instance, field_name)
+    old_name = sender.objects.filter(pk=instance.pk).values_list(
+        field_name, flat=True
+    ).first()
+    if old_name and (not image._committed or image.name != old_name):
+        instance._replaced_image = old_name
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=User)
+def release_replaced_image(sender, instance, **kwargs):
+    release_image(sender, instance.__dict__.pop('_replaced_image', None))
+
+
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=User)
+def release_deleted_image(sender, instance, **kwargs):
+    release_image(sender, getattr(instance, IMAGE_FIELDS[sender]).name)
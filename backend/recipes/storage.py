@@ -0,0 +1,92 @@
+import hashlib
+import posixpath
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+
+from .constants import CONTENT_STORAGE_DIR, IMAGE_VARIANTS_DIR
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Файлы хранятся под именем sha256 содержимого, поэтому одинаковые
+    загрузки занимают место один раз. Каждое сохранение добавляет
+    ссылку в StoredFile, release() её снимает; файл без ссылок
+    удаляется вместе с уменьшенными копиями.
+
+    Копии из IMAGE_VARIANTS_DIR уже названы по исходному файлу и
+    сохраняются как обычно.
+    """
+
+    def is_content_addressed(self, name):
+        return not name.startswith(f'{IMAGE_VARIANTS_DIR}/')
+
+    def get_content_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        return posixpath.join(
+            CONTENT_STORAGE_DIR, digest[:2], digest[2:4],
+            digest + posixpath.splitext(name)[1].lower(),
+        )
+
+    def get_available_name(self, name, max_length=None):
+        if self.is_content_addressed(name):
+            return name
+        return super().get_available_name(name, max_length)
+
+    def _save(self, name, content):
+        if not self.is_content_addressed(name):
+            return super()._save(name, content)
+        from .models import StoredFile
+
+        name = self.get_content_name(name, content)
+        with transaction.atomic():
+            # Вставка с ON CONFLICT DO NOTHING: одновременные загрузки
+            # одного нового файла не упираются в уникальность name,
+            # а затем ждут друг друга на блокировке строки.
+            StoredFile.objects.bulk_create(
+                [StoredFile(name=name, size=content.size)],
+                ignore_conflicts=True,
+            )
+            stored = StoredFile.objects.select_for_update().get(name=name)
+            if not self.exists(name):
+                name = super()._save(name, content)
+            stored.references = F('references') + 1
+            stored.save(update_fields=['references'])
+        return name
+
+    def release(self, name):
+        """Снимает ссылку; файл без ссылок удаляется после коммита."""
+        from .models import StoredFile
+
+        with transaction.atomic():
+            stored = StoredFile.objects.select_for_update().filter(
+                name=name
+            ).first()
+            if stored is None:
+                return
+            stored.references = max(stored.references - 1, 0)
+            stored.save(update_fields=['references'])
+        if not stored.references:
+            transaction.on_commit(lambda: self.delete_unused(name))
+
+    def delete_unused(self, name):
+        """Удаляет файл, если на него так и не появилось новых ссылок."""
+        from .models import StoredFile
+
+        with transaction.atomic():
+            deleted, _ = StoredFile.objects.filter(
+                name=name, references=0
+            ).delete()
+            if not deleted:
+                return
+            self.delete(name)
+            variants = posixpath.join(
+                IMAGE_VARIANTS_DIR, posixpath.splitext(name)[0]
+            )
+            if self.exists(variants):
+                for file_name in self.listdir(variants)[1]:
+                    self.delete(posixpath.join(variants, file_name))
@@ -0,0 +1,117 @@
+from django.test import TestCase
+
+from users.models import User
+from .models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                     ShoppingCart, ShoppingListItem)
+
+
+def create_user(username):
+    return User.objects.create_user(
+        username=username, email=f'{username}@example.com', password='pass'
+    )
+
+
+def create_recipe(author, name, amounts):
+    recipe = Recipe.objects.create(
+        author=author, name=name, text='текст',
+        image='recipes/images/test.jpg', cooking_time=10,
+    )
+    for ingredient, amount in amounts.items():
+        RecipeIngredient.objects.create(
+            recipe=recipe, ingredient=ingredient, amount=amount
+        )
+    return recipe
+
+
+class ShoppingListTests(TestCase):
+
+    def setUp(self):
+        self.author = create_user('author')
+        self.user = create_user('user')
+        self.other = create_user('other')
+        self.flour, self.sugar, self.salt = (
+            Ingredient.objects.create(name=name, measurement_unit='г')
+            for name in ('мука', 'сахар', 'соль')
+        )
+        self.cake = create_recipe(
+            self.author, 'пирог', {self.flour: 100, self.sugar: 2}
+        )
+        self.bread = create_recipe(self.author, 'хлеб', {self.flour: 50})
+
+    def get_items(self, user):
+        return dict(ShoppingListItem.objects.filter(user=user).values_list(
+            'ingredient_id', 'total_amount'
+        ))
+
+    def test_add_recipes_sums_amounts(self):
+        ShoppingCart.objects.create(user=self.user, recipe=self.cake)
+        ShoppingCart.objects.create(user=self.user, recipe=self.bread)
+        self.assertEqual(self.get_items(self.user), {
+            self.flour.pk: 150, self.sugar.pk: 2,
+        })
+        self.assertEqual(self.get_items(self.other), {})
+
+    def test_remove_recipe_deletes_zero_totals(self):
+        ShoppingCart.objects.create(user=self.user, recipe=self.cake)
+        ShoppingCart.objects.create(user=self.user, recipe=self.bread)
+        ShoppingCart.objects.get(user=self.user, recipe=self.cake).delete()
+        self.assertEqual(self.get_items(self.user), {self.flour.pk: 50})
+        ShoppingCart.objects.get(user=self.user, recipe=self.bread).delete()
+        self.assertFalse(
+            ShoppingListItem.objects.filter(user=self.user).exists()
+        )
+
+    def test_recipe_edit_updates_every_cart(self):
+        for user in (self.user, self.other):
+            ShoppingCart.objects.create(user=user, recipe=self.cake)
+        ShoppingCart.objects.create(user=self.user, recipe=self.bread)
+
+        flour = RecipeIngredient.objects.get(
+            recipe=self.cake, ingredient=self.flour
+        )
+        flour.amount = 120
+        flour.save()
+        RecipeIngredient.objects.get(
+            recipe=self.cake, ingredient=self.sugar
+        ).delete()
+        RecipeIngredient.objects.create(
+            recipe=self.cake, ingredient=self.salt, amount=5
+        )
+
+        self.assertEqual(self.get_items(self.user), {
+            self.flour.pk: 170, self.salt.pk: 5,
+        })
+        self.assertEqual(self.get_items(self.other), {
+            self.flour.pk: 120, self.salt.pk: 5,
+        })
+
+
+class CounterTests(TestCase):
+
+    def setUp(self):
+        self.author = create_user('author')
+        self.user = create_user('user')
+        self.recipe = create_recipe(self.author, 'пирог', {})
+
+    def test_recipes_count(self):
+        create_recipe(self.author, 'хлеб', {})
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.recipes_count, 2)
+        self.recipe.delete()
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.recipes_count, 1)
+
+    def test_favorites_count(self):
+        favorite = Favorite.objects.create(user=self.user, recipe=self.recipe)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, 1)
+        favorite.delete()
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, 0)
+
+    def test_counter_does_not_go_below_zero(self):
+        favorite = Favorite.objects.create(user=self.user, recipe=self.recipe)
+        Recipe.objects.filter(pk=self.recipe.pk).update(favorites_count=0)
+        favorite.delete()
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, 0)
@@ -0,0 +1,31 @@
+from threading import local
+
+from django.db import connection, transaction
+
+_local = local()
+
+
+def on_commit_batch(callback, ids):
+    """
+    Копит ids до коммита текущей транзакции и вызывает callback(ids)
+    один раз. Вне транзакции callback вызывается сразу.
+
+    Каждый вызов регистрирует свой on_commit: первый выполнившийся
+    забирает весь накопленный набор, остальные видят его пустым. ids из
+    откаченных блоков могут попасть в следующий вызов, поэтому callback
+    должен перечитывать данные из базы.
+    """
+    if not connection.in_atomic_block:
+        callback(set(ids))
+        return
+    pending = getattr(_local, 'pending', None)
+    if pending is None:
+        pending = _local.pending = {}
+    pending.setdefault(callback, set()).update(ids)
+
+    def flush():
+        batch = pending.pop(callback, None)
+        if batch:
+            callback(batch)
+
+    transaction.on_commit(flush)
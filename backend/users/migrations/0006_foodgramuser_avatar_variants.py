@@ -0,0 +1,18 @@
+# Generated by Django 3.2.3 on 2026-10-17 04:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='foodgramuser',
+            name='avatar_variants',
+            field=models.JSONField(default=dict, editable=False, verbose_name='Варианты аватара'),
+        ),
+    ]
@@ -19,6 +19,11 @@ class FoodgramUser(AbstractUser):
         null=True,
         default=None
     )
+    avatar_variants = models.JSONField(
+        'Варианты аватара',
+        default=dict,
+        editable=False,
+    )
 
     first_name = models.CharField(
         'first_name',
@@ -30,6 +35,17 @@ class FoodgramUser(AbstractUser):
         max_length=MAX_NAMES_LENGTH,
     )
 
+    recipes_count = models.PositiveIntegerField(
+        'Кол-во рецептов',
+        default=0,
+        editable=False,
+    )
+    followers_count = models.PositiveIntegerField(
+        'Кол-во подписчиков',
+        default=0,
+        editable=False,
+    )
+
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ('username', 'first_name', 'last_name',)
 
@@ -0,0 +1,21 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.counters import change_counter
+from .models import Follow, User
+
+
+@receiver(post_save, sender=Follow)
+def increment_followers_count(instance, created, **kwargs):
+    if created:
+        change_counter(
+            User.objects.filter(pk=instance.following_id),
+            'followers_count', 1,
+        )
+
+
+@receiver(post_delete, sender=Follow)
+def decrement_followers_count(instance, **kwargs):
+    change_counter(
+        User.objects.filter(pk=instance.following_id), 'followers_count', -1
+    )
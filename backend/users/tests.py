@@ -0,0 +1,32 @@
+from django.test import TestCase
+
+from .models import Follow, User
+
+
+class FollowersCountTests(TestCase):
+
+    def setUp(self):
+        self.author, self.reader, self.other = (
+            User.objects.create_user(
+                username=username, email=f'{username}@example.com',
+                password='pass',
+            )
+            for username in ('author', 'reader', 'other')
+        )
+
+    def get_followers_count(self):
+        self.author.refresh_from_db()
+        return self.author.followers_count
+
+    def test_follow_and_unfollow(self):
+        Follow.objects.create(user=self.reader, following=self.author)
+        Follow.objects.create(user=self.other, following=self.author)
+        self.assertEqual(self.get_followers_count(), 2)
+        Follow.objects.filter(user=self.reader).delete()
+        self.assertEqual(self.get_followers_count(), 1)
+
+    def test_count_does_not_go_below_zero(self):
+        follow = Follow.objects.create(user=self.reader, following=self.author)
+        User.objects.filter(pk=self.author.pk).update(followers_count=0)
+        follow.delete()
+        self.assertEqual(self.get_followers_count(), 0)